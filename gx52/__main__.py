@@ -16,6 +16,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 import signal
 import locale
 import gettext
@@ -25,14 +26,18 @@ from types import TracebackType
 from typing import Type
 from os.path import abspath, join, dirname
 from peewee import SqliteDatabase
+from playhouse.migrate import SqliteMigrator, migrate
 from reactivex.disposable import CompositeDisposable
+from gi.events import GLibEventLoopPolicy
 from gi.repository import GLib
 from gx52.conf import APP_PACKAGE_NAME
 from gx52.model.x52_profile import X52Profile
 from gx52.model.x52_pro_profile import X52ProProfile
 from gx52.model.current_profile import CurrentProfile
 from gx52.model.setting import Setting
+from gx52.repository.profile_repository import ProfileRepository
 from gx52.repository.x52_repository import X52Repository
+from gx52.interactor.clock_sync_interactor import ClockSyncInteractor
 from gx52.util.log import set_log_level
 from gx52.di import INJECTOR
 from gx52.app import Application
@@ -56,6 +61,8 @@ def _cleanup() -> None:
     try:
         _LOG.debug("cleanup")
         INJECTOR.get(X52Repository).cleanup()
+        INJECTOR.get(ClockSyncInteractor).cleanup()
+        INJECTOR.get(ProfileRepository).cleanup()
         composite_disposable = INJECTOR.get(CompositeDisposable)
         composite_disposable.dispose()
         database = INJECTOR.get(SqliteDatabase)
@@ -86,11 +93,21 @@ def _init_database() -> None:
         CurrentProfile,
         Setting
     ])
+    # create_tables() leaves existing tables alone: add the (nullable) columns introduced after they were created
+    migrator = SqliteMigrator(database)
+    for model in (X52Profile, X52ProProfile):
+        table_name = model._meta.table_name  # pylint: disable=protected-access
+        columns = {column.name for column in database.get_columns(table_name)}
+        migrate(*(migrator.add_column(table_name, field.column_name, field)
+                  for field in model._meta.sorted_fields  # pylint: disable=protected-access
+                  if field.column_name not in columns))
 
 
 def main() -> int:
     _LOG.debug("main")
     _init_database()
+    # asyncio tasks (e.g. the evdev reading) run on the GLib main loop of the application
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
     application: Application = INJECTOR.get(Application)
     GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGINT, application.quit)
     exit_status = application.run(sys.argv)
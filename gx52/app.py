@@ -113,6 +113,10 @@ class Application(Gtk.Application):
             set_autostart_entry(True)
             start_app = False
 
+        if _Options.RECORD_EVDEV.value in options:
+            _LOG.debug(f"Option {_Options.RECORD_EVDEV.value} selected")
+            self._presenter.start_evdev_recording(options[_Options.RECORD_EVDEV.value])
+
         if _Options.ADD_UDEV_RULE.value in options:
             _LOG.debug("Option %s selected", _Options.ADD_UDEV_RULE.value)
             exit_value += self._udev_interactor.add_udev_rule()
@@ -137,6 +141,10 @@ class Application(Gtk.Application):
                               description="Show the App version"),
             build_glib_option(_Options.HIDE_WINDOW.value,
                               description="Start with the main window hidden"),
+            build_glib_option(_Options.RECORD_EVDEV.value,
+                              arg=GLib.OptionArg.STRING,
+                              description="Record the input events of the device to a file, to replay them later",
+                              arg_description="FILE"),
             build_glib_option(_Options.ADD_UDEV_RULE.value,
                               description="Add udev rule to allow execution without root permission"),
             build_glib_option(_Options.REMOVE_UDEV_RULE.value,
@@ -158,3 +166,4 @@ class _Options(Enum):
     AUTOSTART_OFF = 'autostart-off'
     ADD_UDEV_RULE = 'add-udev-rule'
     REMOVE_UDEV_RULE = 'remove-udev-rule'
+    RECORD_EVDEV = 'record-evdev'
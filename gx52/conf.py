@@ -41,6 +41,7 @@ SETTINGS_DEFAULTS: Dict[str, Any] = {
     'settings_minimize_to_tray': True,
     'settings_refresh_interval': 3,
     'settings_show_app_indicator': True,
+    'settings_low_latency_input': False,
 }
 
 DESKTOP_ENTRY: Dict[str, str] = {
@@ -65,7 +65,10 @@ class ProviderModule(Module):
     @provider
     def provide_database(self) -> SqliteDatabase:
         _LOG.debug("provide SqliteDatabase")
-        database = SqliteDatabase(get_config_path(APP_DB_NAME))
+        # WAL with synchronous=NORMAL: a crash can lose the last transactions but never corrupts the database, and
+        # committing does not wait for an fsync
+        database = SqliteDatabase(get_config_path(APP_DB_NAME),
+                                  pragmas={'journal_mode': 'wal', 'synchronous': 'normal'})
         database.connect()
         return database
 
@@ -1,13 +1,18 @@
 """USB driver for third generation NZXT Kraken X and M liquid coolers.
 """
 import datetime
+import errno
 import logging
+from contextlib import contextmanager
 from enum import Enum, unique, IntEnum
-from typing import Any, List
+from time import monotonic, sleep
+from typing import Any, List, Dict, Optional, NamedTuple, Tuple, Iterator, Union
 
 import usb.util
 
-from usb.core import Device
+from usb.core import Device, USBError
+
+from gx52.util.concurrency import TokenBucket
 
 _LOG = logging.getLogger(__name__)
 
@@ -79,6 +84,8 @@ class X52BlinkStatus(Enum):
 
 
 _X52_MFD_LINE_SIZE = 16
+_X52_MFD_CHARS_PER_TRANSFER = 2
+_X52_MFD_EMPTY_LINE = " " * _X52_MFD_LINE_SIZE
 
 # Flag bits
 _X52_FLAG_IS_PRO = 0
@@ -94,7 +101,57 @@ class X52MfdLine(Enum):
     LINE3 = 0xd4
 
 
-_WRITE_TIMEOUT = 5000
+@unique
+class X52CommandClass(Enum):
+    # User feedback (MFD text, LEDs, brightness, indicators): useless if late
+    INTERACTIVE = 'interactive'
+    # Clock and date sync
+    BACKGROUND = 'background'
+
+
+class X52WritePolicy:
+    """How fast transfers can be sent, how long to wait for them, how many times to retry them and when to consider
+    the device degraded.
+
+    Transfers are limited to `rate` per second with bursts of `burst`, or not limited at all if `rate` is None (e.g. for
+    a simulated device). Background commands can't use the last `background_reserve` tokens, which are kept for user
+    feedback: they wait for at most `background_max_delay` seconds and are dropped after that.
+
+    After `failure_threshold` consecutive failed commands the device is degraded for `recovery_time` seconds: in the
+    meantime interactive commands are dropped immediately, while background ones are still tried once to probe it.
+    """
+
+    def __init__(self,
+                 interactive_timeout_ms: int = 200,
+                 background_timeout_ms: int = 1000,
+                 max_retries: int = 2,
+                 retry_backoff: float = 0.02,
+                 failure_threshold: int = 3,
+                 recovery_time: float = 5.0,
+                 rate: Optional[float] = 250,
+                 burst: int = 40,
+                 background_reserve: int = 10,
+                 background_max_delay: float = 1.0) -> None:
+        self.timeouts_ms = {
+            X52CommandClass.INTERACTIVE: interactive_timeout_ms,
+            X52CommandClass.BACKGROUND: background_timeout_ms,
+        }
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.rate = rate
+        self.burst = burst
+        self.background_reserve = background_reserve
+        self.background_max_delay = background_max_delay
+
+
+class X52DeviceDegradedError(Exception):
+    pass
+
+
+class X52RateLimitedError(Exception):
+    pass
 
 
 @unique
@@ -119,6 +176,14 @@ _SUPPORTED_DEVICES: List[X52Device] = [
     X52Device(ID_VENDOR, ID_PRODUCTS[1], X52DeviceType.X52, 'Saitek PLC X52 Flight Controller'),
     X52Device(ID_VENDOR, ID_PRODUCTS[2], X52DeviceType.X52, 'Saitek PLC X52 Flight Controller')
 ]
+_SUPPORTED_DEVICES_BY_ID: Dict[Tuple[int, int], X52Device] = {
+    (device.id_vendor, device.id_product): device for device in _SUPPORTED_DEVICES
+}
+
+
+def get_bus_path(usb_device: Device) -> str:
+    """Return the sysfs name of the USB device port, e.g. `3-1.4` for port 4 of the hub on port 1 of bus 3."""
+    return f"{usb_device.bus}-{'.'.join(str(port) for port in usb_device.port_numbers or ())}"
 
 
 @unique
@@ -167,27 +232,276 @@ class X52ColoredLedStatus(IntEnum):
     AMBER = 3
 
 
+# LED bits driven by each LED setting: (bit, None) for single color LEDs, (red bit, green bit) for colored ones
+_X52_LED_BITS: Dict[str, Tuple[int, Optional[int]]] = {
+    'led_fire': (X52Led.X52_BIT_LED_FIRE, None),
+    'led_a': (X52LedRed.X52_BIT_LED_A_RED, X52LedGreen.X52_BIT_LED_A_GREEN),
+    'led_b': (X52LedRed.X52_BIT_LED_B_RED, X52LedGreen.X52_BIT_LED_B_GREEN),
+    'led_d': (X52LedRed.X52_BIT_LED_D_RED, X52LedGreen.X52_BIT_LED_D_GREEN),
+    'led_e': (X52LedRed.X52_BIT_LED_E_RED, X52LedGreen.X52_BIT_LED_E_GREEN),
+    'led_t1_t2': (X52LedRed.X52_BIT_LED_T1_RED, X52LedGreen.X52_BIT_LED_T1_GREEN),
+    'led_t3_t4': (X52LedRed.X52_BIT_LED_T2_RED, X52LedGreen.X52_BIT_LED_T2_GREEN),
+    'led_t5_t6': (X52LedRed.X52_BIT_LED_T3_RED, X52LedGreen.X52_BIT_LED_T3_GREEN),
+    'led_pov_2': (X52LedRed.X52_BIT_LED_POV_RED, X52LedGreen.X52_BIT_LED_POV_GREEN),
+    'led_i': (X52LedRed.X52_BIT_LED_I_RED, X52LedGreen.X52_BIT_LED_I_GREEN),
+    'led_throttle': (X52Led.X52_BIT_LED_THROTTLE, None),
+}
+
+
+def _brightness_value(level: int) -> int:
+    if level < X52_BRIGHTNESS_MIN or level > X52_BRIGHTNESS_MAX:
+        raise ValueError(f"Level must be between {X52_BRIGHTNESS_MIN:d} and {X52_BRIGHTNESS_MAX:d}")
+    return level * 4
+
+
+def _clock_1_value(time: datetime.time, use_24h: bool) -> int:
+    value = (1 if use_24h else 0) << 15
+    value += time.hour << 8
+    value += time.minute
+    return value
+
+
+def _clock_offset_value(offset: datetime.timedelta, use_24h: bool) -> int:
+    offset_in_min = int(offset.total_seconds() / 60)
+    if offset_in_min < -1024 or offset_in_min > 1024:
+        raise ValueError(f"Hours must be between -1024 and 1024")
+
+    value = (1 if use_24h else 0) << 15
+    if offset_in_min < 0:
+        value += 1 << 10
+        offset_in_min *= -1
+    value += offset_in_min
+    return value
+
+
+def _date_values(date: datetime.date, date_format: X52DateFormat) -> Tuple[int, int]:
+    year = int(str(date.year)[-2:])
+    month = date.month
+    day = date.day
+
+    if date_format == X52DateFormat.YYMMDD:
+        value1 = month << 8
+        value1 += year
+        value2 = day
+    elif date_format == X52DateFormat.DDMMYY:
+        value1 = day
+        value1 += month << 8
+        value2 = year
+    elif date_format == X52DateFormat.MMDDYY:
+        value1 = month
+        value1 += day << 8
+        value2 = year
+    else:
+        raise ValueError(f"Unsupported X52DateFormat: ${date_format.name}")
+    return value1, value2
+
+
+class X52State(NamedTuple):
+    """Immutable snapshot of the device registers managed by the driver.
+
+    All the LEDs are packed in `leds`, one bit per `X52Led`/`X52LedRed`/`X52LedGreen` value, and only the bits set in
+    `led_mask` are known. Clock and date fields hold the raw register values. A `None` field, like an LED outside the
+    mask, is unknown (or not managed): diffing always writes it if the new state knows it, and never if it doesn't.
+    """
+    leds: int = 0
+    led_mask: int = 0
+    led_brightness: Optional[int] = None
+    mfd_brightness: Optional[int] = None
+    shift: Optional[bool] = None
+    blink: Optional[bool] = None
+    clock_1: Optional[int] = None
+    clock_2_offset: Optional[int] = None
+    clock_3_offset: Optional[int] = None
+    date_ddmm: Optional[int] = None
+    date_year: Optional[int] = None
+
+    def with_led(self, attr_name: str, led_status: Union[X52ColoredLedStatus, X52LedStatus]) -> 'X52State':
+        """Return a copy with the LED named like the driver setter (e.g. `led_a`) set and the other LEDs unchanged."""
+        bit, green_bit = _X52_LED_BITS[attr_name]
+        if green_bit is None:
+            mask = 1 << bit
+            value = led_status.value << bit
+        else:
+            mask = 1 << bit | 1 << green_bit
+            # X52ColoredLedStatus has the green LED in bit 0 and the red one in bit 1
+            value = (led_status.value >> 1 & 1) << bit | (led_status.value & 1) << green_bit
+        return self._replace(leds=self.leds & ~mask | value, led_mask=self.led_mask | mask)
+
+    def with_clock_1(self, time: datetime.time, use_24h: bool = True) -> 'X52State':
+        return self._replace(clock_1=_clock_1_value(time, use_24h))
+
+    def with_clock_2_offset(self, offset: datetime.timedelta, use_24h: bool = True) -> 'X52State':
+        return self._replace(clock_2_offset=_clock_offset_value(offset, use_24h))
+
+    def with_clock_3_offset(self, offset: datetime.timedelta, use_24h: bool = True) -> 'X52State':
+        return self._replace(clock_3_offset=_clock_offset_value(offset, use_24h))
+
+    def with_date(self, date: datetime.date, date_format: X52DateFormat = X52DateFormat.YYMMDD) -> 'X52State':
+        date_ddmm, date_year = _date_values(date, date_format)
+        return self._replace(date_ddmm=date_ddmm, date_year=date_year)
+
+    def with_register(self, index: int, value: int, register: int = 0) -> 'X52State':
+        """Return a copy updated with a register write, as produced by `diff`. Unmanaged registers are ignored."""
+        if index == _X52_LED:
+            mask = 1 << register
+            return self._replace(leds=self.leds & ~mask | (value & 1) << register, led_mask=self.led_mask | mask)
+        if index == X52BrightnessCommand.LED_BRIGHTNESS.value:
+            return self._replace(led_brightness=value // 4)
+        if index == X52BrightnessCommand.MFD_BRIGHTNESS.value:
+            return self._replace(mfd_brightness=value // 4)
+        if index == _X52_SHIFT_INDICATOR:
+            return self._replace(shift=value == X52ShiftStatus.ON.value)
+        if index == _X52_BLINK_INDICATOR:
+            return self._replace(blink=value == X52BlinkStatus.ON.value)
+        if index == X52TimeCommand.TIME_CLOCK1.value:
+            return self._replace(clock_1=value)
+        if index == X52TimeCommand.OFFS_CLOCK2.value:
+            return self._replace(clock_2_offset=value)
+        if index == X52TimeCommand.OFFS_CLOCK3.value:
+            return self._replace(clock_3_offset=value)
+        if index == X52DateCommand.DDMM.value:
+            return self._replace(date_ddmm=value)
+        if index == X52DateCommand.YEAR.value:
+            return self._replace(date_year=value)
+        return self
+
+    def diff(self, new: 'X52State') -> List[Tuple[int, int, int]]:
+        """Return the (command index, value, LED bit) writes needed to go from this state to the new one.
+
+        Fields that are `None` in the new state, and LEDs outside its mask, are left untouched.
+        """
+        commands: List[Tuple[int, int, int]] = []
+        # LEDs known in the new state that differ from, or are unknown in, this one
+        changed = (self.leds ^ new.leds | ~self.led_mask) & new.led_mask
+        while changed:
+            bit = changed & -changed
+            led = bit.bit_length() - 1
+            commands.append((_X52_LED, led << 8 | (new.leds >> led & 1), led))
+            changed ^= bit
+        if new.led_brightness is not None and new.led_brightness != self.led_brightness:
+            commands.append((X52BrightnessCommand.LED_BRIGHTNESS.value, _brightness_value(new.led_brightness), 0))
+        if new.mfd_brightness is not None and new.mfd_brightness != self.mfd_brightness:
+            commands.append((X52BrightnessCommand.MFD_BRIGHTNESS.value, _brightness_value(new.mfd_brightness), 0))
+        if new.shift is not None and new.shift != self.shift:
+            shift = X52ShiftStatus.ON if new.shift else X52ShiftStatus.OFF
+            commands.append((_X52_SHIFT_INDICATOR, shift.value, 0))
+        if new.blink is not None and new.blink != self.blink:
+            blink = X52BlinkStatus.ON if new.blink else X52BlinkStatus.OFF
+            commands.append((_X52_BLINK_INDICATOR, blink.value, 0))
+        for index, old_value, new_value in ((X52TimeCommand.TIME_CLOCK1.value, self.clock_1, new.clock_1),
+                                            (X52TimeCommand.OFFS_CLOCK2.value, self.clock_2_offset, new.clock_2_offset),
+                                            (X52TimeCommand.OFFS_CLOCK3.value, self.clock_3_offset, new.clock_3_offset),
+                                            (X52DateCommand.DDMM.value, self.date_ddmm, new.date_ddmm),
+                                            (X52DateCommand.YEAR.value, self.date_year, new.date_year)):
+            if new_value is not None and new_value != old_value:
+                commands.append((index, new_value, 0))
+        return commands
+
+
+class _X52MfdLineShadow(NamedTuple):
+    """What is currently shown on an MFD line.
+
+    The firmware appends each pair of characters at a write cursor that can only be moved back to the start of the
+    line by clearing it, so everything after `cursor` is known to be blank.
+    """
+    text: str
+    cursor: int
+
+
+_BACKGROUND_COMMANDS = frozenset(command.value for command in (*X52TimeCommand, *X52DateCommand))
+
+
 class X52Driver:
-    def __init__(self, usb_device: Device, x52_device: X52Device) -> None:
+    def __init__(self,
+                 usb_device: Device,
+                 x52_device: X52Device,
+                 write_policy: Optional[X52WritePolicy] = None) -> None:
         self.usb_device = usb_device
         self.x52_device = x52_device
+        self.write_policy = write_policy or X52WritePolicy()
+        self._consecutive_failures = 0
+        self._degraded_until = 0.0
+        self._token_bucket = None if self.write_policy.rate is None \
+            else TokenBucket(self.write_policy.rate, self.write_policy.burst)
+        self._mfd_lines: Dict[X52MfdLine, Optional[_X52MfdLineShadow]] = {line: None for line in X52MfdLine}
+        # Registers written inside batch(), keyed by command index and LED bit (0 for non LED commands)
+        self._batch: Optional[Dict[Tuple[int, int], int]] = None
+        # Registers as last written, by apply_state() or by any other setter: the only cache of the device registers
+        self._state = X52State()
+
+    @property
+    def bus_path(self) -> str:
+        return get_bus_path(self.usb_device)
 
     @classmethod
-    def find_supported_devices(cls) -> List['X52Driver']:
+    def find_supported_devices(cls, known_drivers: Optional[Dict[str, 'X52Driver']] = None) -> List['X52Driver']:
         """Find compatible devices and return corresponding driver instances.
 
+        The bus is scanned only once. Drivers in `known_drivers` (keyed by bus path) are reused if the same device is
+        still attached at the same path, so that their cached state is kept.
+
         Returns a list of driver class instances.
         """
+        known_drivers = known_drivers or {}
         devices: List['X52Driver'] = []
-        for supported_device in _SUPPORTED_DEVICES:
-            usb_devices = usb.core.find(
-                idVendor=supported_device.id_vendor,
-                idProduct=supported_device.id_product,
-                find_all=True)
-            for dev in usb_devices:
-                devices.append(cls(dev, supported_device))
+        for dev in usb.core.find(find_all=True, custom_match=cls._is_supported):
+            driver = known_drivers.get(get_bus_path(dev))
+            if driver is None or driver.usb_device.address != dev.address:
+                driver = cls(dev, _SUPPORTED_DEVICES_BY_ID[(dev.idVendor, dev.idProduct)])
+            devices.append(driver)
         return devices
 
+    @classmethod
+    def find_supported_device(cls, bus_path: str) -> Optional['X52Driver']:
+        """Find the compatible device attached at the given bus path, if any."""
+        dev = usb.core.find(custom_match=lambda d: cls._is_supported(d) and get_bus_path(d) == bus_path)
+        if dev is None:
+            return None
+        return cls(dev, _SUPPORTED_DEVICES_BY_ID[(dev.idVendor, dev.idProduct)])
+
+    @staticmethod
+    def _is_supported(usb_device: Device) -> bool:
+        return (usb_device.idVendor, usb_device.idProduct) in _SUPPORTED_DEVICES_BY_ID
+
+    @property
+    def degraded(self) -> bool:
+        return self._consecutive_failures >= self.write_policy.failure_threshold
+
+    def invalidate(self) -> None:
+        """Forget what the device is supposed to show, so that the next writes are always sent.
+
+        Must be called when the device state is no longer known, e.g. after a reset or a replug.
+        """
+        _LOG.debug("invalidating cached device state")
+        self._state = X52State()
+        self._mfd_lines = {line: None for line in X52MfdLine}
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Collect the register writes done inside the block and send them when the block exits.
+
+        Only the last value written to each register is sent and nothing is sent if the block raises. MFD text is not
+        a register and is still written immediately. Nested blocks are merged into the outermost one.
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._batch = {}
+        try:
+            yield
+        except BaseException:
+            self._batch = None
+            raise
+        pending, self._batch = self._batch, None
+        for (index, register), value in pending.items():
+            self._write_register(index, value, register)
+
+    def apply_state(self, state: X52State) -> None:
+        """Bring the device to the given state, writing only the registers that differ from the last written ones."""
+        with self.batch():
+            for index, value, register in self._state.diff(state):
+                self._write_register(index, value, register)
+
     def set_led_a(self, led: X52ColoredLedStatus) -> None:
         self._set_colored_led_status(led, X52LedRed.X52_BIT_LED_A_RED, X52LedGreen.X52_BIT_LED_A_GREEN)
 
@@ -228,65 +542,111 @@ class X52Driver:
         self._set_brightness(X52BrightnessCommand.MFD_BRIGHTNESS, level)
 
     def set_shift_status(self, enabled: bool) -> None:
-        self._vendor_command(_X52_SHIFT_INDICATOR,
+        self._write_register(_X52_SHIFT_INDICATOR,
                              X52ShiftStatus.ON.value if enabled else X52ShiftStatus.OFF.value)
 
     def set_blink_status(self, enabled: bool) -> None:
-        self._vendor_command(_X52_BLINK_INDICATOR,
+        self._write_register(_X52_BLINK_INDICATOR,
                              X52BlinkStatus.ON.value if enabled else X52BlinkStatus.OFF.value)
 
     def set_clock_1(self, time: datetime.time, use_24h: bool = True) -> None:
-        value = (1 if use_24h else 0) << 15
-        value += time.hour << 8
-        value += time.minute
-        self._vendor_command(X52TimeCommand.TIME_CLOCK1.value, value)
+        self._write_register(X52TimeCommand.TIME_CLOCK1.value, _clock_1_value(time, use_24h))
 
     def set_clock_2_offset(self, offset: datetime.timedelta, use_24h: bool = True) -> None:
-        self._set_clock_offset(X52TimeCommand.OFFS_CLOCK2, int(offset.total_seconds() / 60), use_24h)
+        self._write_register(X52TimeCommand.OFFS_CLOCK2.value, _clock_offset_value(offset, use_24h))
 
     def set_clock_3_offset(self, offset: datetime.timedelta, use_24h: bool = True) -> None:
-        self._set_clock_offset(X52TimeCommand.OFFS_CLOCK3, int(offset.total_seconds() / 60), use_24h)
+        self._write_register(X52TimeCommand.OFFS_CLOCK3.value, _clock_offset_value(offset, use_24h))
 
     def set_date(self, date: datetime.date, date_format: X52DateFormat = X52DateFormat.YYMMDD) -> None:
-        year = int(str(date.year)[-2:])
-        month = date.month
-        day = date.day
-
-        if date_format == X52DateFormat.YYMMDD:
-            value1 = month << 8
-            value1 += year
-            value2 = day
-        elif date_format == X52DateFormat.DDMMYY:
-            value1 = day
-            value1 += month << 8
-            value2 = year
-        elif date_format == X52DateFormat.MMDDYY:
-            value1 = month
-            value1 += day << 8
-            value2 = year
-        else:
-            raise ValueError(f"Unsupported X52DateFormat: ${date_format.name}")
-        self._vendor_command(X52DateCommand.DDMM.value, value1)
-        self._vendor_command(X52DateCommand.YEAR.value, value2)
+        date_ddmm, date_year = _date_values(date, date_format)
+        self._write_register(X52DateCommand.DDMM.value, date_ddmm)
+        self._write_register(X52DateCommand.YEAR.value, date_year)
 
     def set_mfd_text(self, line: X52MfdLine, text: str) -> None:
+        """Write the text on the MFD line sending only the transfers needed to reach it from the current content.
+
+        If the text shown on the line starts with the content already written, the missing characters are appended,
+        otherwise the line is cleared and rewritten. Trailing spaces are never sent since a cleared line is blank.
+        """
         if len(text) > _X52_MFD_LINE_SIZE:
             raise ValueError(f"The text length must be less than 16: {len(text)}")
         text = f"{text:16s}"
-        self._vendor_command(line.value | _X52_MFD_CLEAR_LINE, 0)
-        for i in range(0, len(text), 2):
-            value = int.from_bytes(text[i + 1].encode("ascii"), "big") << 8 \
-                    | int.from_bytes(text[i].encode("ascii"), "big")
-            self._vendor_command(line.value, value)
-
-    def _vendor_command(self, index: int, value: int) -> Any:
+        data = text.encode("ascii")
+        end = len(text.rstrip())
+        end += end % _X52_MFD_CHARS_PER_TRANSFER
+
+        shadow = self._mfd_lines[line]
+        try:
+            if shadow is None or text[:shadow.cursor] != shadow.text[:shadow.cursor]:
+                self._vendor_command(line.value | _X52_MFD_CLEAR_LINE, 0)
+                shadow = _X52MfdLineShadow(_X52_MFD_EMPTY_LINE, 0)
+                self._mfd_lines[line] = shadow
+            for i in range(shadow.cursor, end, _X52_MFD_CHARS_PER_TRANSFER):
+                # Appending is not idempotent: if a transfer times out after reaching the device, a retry would
+                # write the characters twice
+                self._vendor_command(line.value, data[i + 1] << 8 | data[i], retry=False)
+                cursor = i + _X52_MFD_CHARS_PER_TRANSFER
+                self._mfd_lines[line] = _X52MfdLineShadow(f"{text[:cursor]:16s}", cursor)
+        except Exception:
+            # The transfer may or may not have reached the device: the next write will clear the line
+            self._mfd_lines[line] = None
+            raise
+
+    def _vendor_command(self, index: int, value: int, retry: bool = True) -> Any:
         _LOG.debug(f'index = 0x{index:x} value = {value:016b}')
-        return self.usb_device.ctrl_transfer(64, _X52_VENDOR_REQUEST, value, index, None, _WRITE_TIMEOUT)
+        policy = self.write_policy
+        command_class = X52CommandClass.BACKGROUND if index in _BACKGROUND_COMMANDS else X52CommandClass.INTERACTIVE
+        max_retries = policy.max_retries if retry else 0
+        if self.degraded:
+            if command_class == X52CommandClass.INTERACTIVE and monotonic() < self._degraded_until:
+                raise X52DeviceDegradedError(f"{self.x52_device.device_type.value} is not responding, command dropped")
+            max_retries = 0
+        if self._token_bucket is not None:
+            if command_class == X52CommandClass.INTERACTIVE:
+                self._token_bucket.acquire()
+            elif not self._token_bucket.acquire(policy.background_reserve, policy.background_max_delay):
+                raise X52RateLimitedError(f"Too many transfers to {self.x52_device.device_type.value}, "
+                                          f"command dropped")
+        attempt = 0
+        while True:
+            try:
+                result = self.usb_device.ctrl_transfer(64, _X52_VENDOR_REQUEST, value, index, None,
+                                                       policy.timeouts_ms[command_class])
+            except USBError as e:
+                self.invalidate()
+                if attempt >= max_retries or e.errno == errno.ENODEV:
+                    self._consecutive_failures += 1
+                    if self.degraded:
+                        _LOG.warning(f"{self.x52_device.device_type.value} degraded after "
+                                     f"{self._consecutive_failures} failed commands")
+                        self._degraded_until = monotonic() + policy.recovery_time
+                    raise
+                attempt += 1
+                _LOG.debug(f'index = 0x{index:x} retry {attempt} after error: {e}')
+                sleep(policy.retry_backoff * 2 ** (attempt - 1))
+            else:
+                if self.degraded:
+                    _LOG.info(f"{self.x52_device.device_type.value} is responding again")
+                self._consecutive_failures = 0
+                return result
+
+    def _write_register(self, index: int, value: int, register: int = 0) -> None:
+        # Every register written here is managed by X52State, so an unchanged state means an already applied value
+        if self._batch is not None:
+            self._batch[(index, register)] = value
+            return
+        state = self._state.with_register(index, value, register)
+        if state == self._state:
+            _LOG.debug(f'index = 0x{index:x} value = {value:016b} already applied')
+            return
+        self._vendor_command(index, value)
+        self._state = state
 
     def _set_led_status(self, led: int, led_status: X52LedStatus) -> None:
         value = led << 8
         value += led_status.value
-        self._vendor_command(_X52_LED, value)
+        self._write_register(_X52_LED, value, led)
 
     def _set_colored_led_status(self, led_status: X52ColoredLedStatus, red: X52LedRed, green: X52LedGreen) -> None:
         if led_status == X52ColoredLedStatus.RED:
@@ -305,20 +665,7 @@ class X52Driver:
             raise ValueError(f"Unsupported ColoredLedStatus: ${led_status.name}")
 
     def _set_brightness(self, command: X52BrightnessCommand, level: int) -> None:
-        if level < X52_BRIGHTNESS_MIN or level > X52_BRIGHTNESS_MAX:
-            raise ValueError(f"Level must be between {X52_BRIGHTNESS_MIN:d} and {X52_BRIGHTNESS_MAX:d}")
-        self._vendor_command(command.value, level * 4)
-
-    def _set_clock_offset(self, command: X52TimeCommand, offset_in_min: int, use_24h: bool = True) -> None:
-        if offset_in_min < -1024 or offset_in_min > 1024:
-            raise ValueError(f"Hours must be between -1024 and 1024")
-
-        value = (1 if use_24h else 0) << 15
-        if offset_in_min < 0:
-            value += 1 << 10
-            offset_in_min *= -1
-        value += offset_in_min
-        self._vendor_command(command.value, value)
+        self._write_register(command.value, _brightness_value(level))
 
 
 @unique
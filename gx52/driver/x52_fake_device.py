@@ -0,0 +1,148 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+import struct
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Iterable, Any, Tuple, Callable, Deque
+
+from gx52.driver.x52_driver import X52Device, X52DeviceType, X52State, X52MfdLine, X52BrightnessCommand, \
+    X52TimeCommand, X52DateCommand, X52ShiftStatus, X52BlinkStatus, _SUPPORTED_DEVICES, _X52_LED, \
+    _X52_SHIFT_INDICATOR, _X52_BLINK_INDICATOR, _X52_MFD_CLEAR_LINE, _X52_MFD_LINE_SIZE, _X52_VENDOR_REQUEST
+
+_TRANSCRIPT_MAGIC = b'GX52USB1'
+# timestamp, latency, bmRequestType, bRequest, wValue, wIndex
+_TRANSFER_STRUCT = struct.Struct('<ddBBHH')
+
+
+class X52Transfer(NamedTuple):
+    timestamp: float
+    latency: float
+    bm_request_type: int
+    request: int
+    value: int
+    w_index: int
+
+
+def write_transcript(path: str, transfers: Iterable[X52Transfer]) -> None:
+    with open(path, 'wb') as file:
+        file.write(_TRANSCRIPT_MAGIC)
+        for transfer in transfers:
+            file.write(_TRANSFER_STRUCT.pack(*transfer))
+
+
+def read_transcript(path: str) -> List[X52Transfer]:
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(_TRANSCRIPT_MAGIC):
+        raise ValueError(f"{path} is not a GX52 USB transcript")
+    return [X52Transfer(*fields) for fields in _TRANSFER_STRUCT.iter_unpack(data[len(_TRANSCRIPT_MAGIC):])]
+
+
+class FakeX52UsbDevice:
+    """Stand-in for a pyusb `Device` that simulates an X52/X52 Pro without any hardware.
+
+    Every control transfer is recorded (see `write_transcript()`) and applied to a simulated copy of the observable
+    device state: LEDs, MFD lines, brightness, indicators, clocks and date.
+    """
+
+    def __init__(self,
+                 x52_device: X52Device,
+                 bus: int = 1,
+                 port_numbers: Tuple[int, ...] = (1,),
+                 address: int = 1,
+                 latency: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.idVendor = x52_device.id_vendor  # pylint: disable=invalid-name
+        self.idProduct = x52_device.id_product  # pylint: disable=invalid-name
+        self.bus = bus
+        self.port_numbers = port_numbers
+        self.address = address
+        self.x52_device = x52_device
+        self.latency = latency
+        self.transfers: List[X52Transfer] = []
+        # Raised, in order, by the next transfers instead of reaching the simulated device
+        self.errors: Deque[Exception] = deque()
+        self._clock = clock
+        self._start = clock()
+        self.state = X52State()
+        self.mfd_lines: Dict[X52MfdLine, str] = {line: "" for line in X52MfdLine}
+
+    @classmethod
+    def for_device_type(cls, device_type: X52DeviceType, **kwargs: Any) -> 'FakeX52UsbDevice':
+        x52_device = next(device for device in _SUPPORTED_DEVICES if device.device_type == device_type)
+        return cls(x52_device, **kwargs)
+
+    def ctrl_transfer(self,
+                      bm_request_type: int,
+                      request: int,
+                      value: int = 0,
+                      index: int = 0,
+                      data: Optional[Any] = None,
+                      timeout: Optional[int] = None) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.errors:
+            raise self.errors.popleft()
+        self._apply(X52Transfer(self._clock() - self._start, self.latency, bm_request_type, request, value, index))
+        return 0
+
+    def replay(self, transfers: Iterable[X52Transfer], real_time: bool = False) -> None:
+        """Apply recorded transfers, waiting between them as in the recording if `real_time` is set."""
+        start = self._clock()
+        for transfer in transfers:
+            if real_time:
+                time.sleep(max(0.0, transfer.timestamp - (self._clock() - start)) + transfer.latency)
+            self._apply(transfer)
+
+    def reset(self) -> None:
+        """Simulate a power cycle: the state is lost, the transcript is kept."""
+        self.state = X52State()
+        self.mfd_lines = {line: "" for line in X52MfdLine}
+
+    def _apply(self, transfer: X52Transfer) -> None:
+        self.transfers.append(transfer)
+        if transfer.request != _X52_VENDOR_REQUEST:
+            return
+        index, value = transfer.w_index, transfer.value
+        if index == _X52_LED:
+            led = value >> 8
+            self.state = self.state._replace(leds=self.state.leds & ~(1 << led) | (value & 1) << led,
+                                             led_mask=self.state.led_mask | 1 << led)
+        elif index == X52BrightnessCommand.LED_BRIGHTNESS.value:
+            self.state = self.state._replace(led_brightness=value // 4)
+        elif index == X52BrightnessCommand.MFD_BRIGHTNESS.value:
+            self.state = self.state._replace(mfd_brightness=value // 4)
+        elif index == _X52_SHIFT_INDICATOR:
+            self.state = self.state._replace(shift=value == X52ShiftStatus.ON.value)
+        elif index == _X52_BLINK_INDICATOR:
+            self.state = self.state._replace(blink=value == X52BlinkStatus.ON.value)
+        elif index == X52TimeCommand.TIME_CLOCK1.value:
+            self.state = self.state._replace(clock_1=value)
+        elif index == X52TimeCommand.OFFS_CLOCK2.value:
+            self.state = self.state._replace(clock_2_offset=value)
+        elif index == X52TimeCommand.OFFS_CLOCK3.value:
+            self.state = self.state._replace(clock_3_offset=value)
+        elif index == X52DateCommand.DDMM.value:
+            self.state = self.state._replace(date_ddmm=value)
+        elif index == X52DateCommand.YEAR.value:
+            self.state = self.state._replace(date_year=value)
+        else:
+            for line in X52MfdLine:
+                if index == line.value | _X52_MFD_CLEAR_LINE:
+                    self.mfd_lines[line] = ""
+                elif index == line.value and len(self.mfd_lines[line]) < _X52_MFD_LINE_SIZE:
+                    self.mfd_lines[line] += chr(value & 0xff) + chr(value >> 8)
@@ -0,0 +1,68 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from gi.repository import GLib
+from injector import singleton, inject
+
+from gx52.util.clock import MinuteTimer
+
+_LOG = logging.getLogger(__name__)
+
+
+@singleton
+class ClockSyncInteractor:
+    """Calls the scheduled clock syncs on the GLib main loop at every minute and whenever the wall clock is set.
+
+    There is at most one schedule per key (e.g. per device): scheduling again replaces the previous callback.
+    """
+
+    @inject
+    def __init__(self) -> None:
+        self._callbacks: Dict[Hashable, Callable[[], Any]] = {}
+        self._timer: Optional[MinuteTimer] = None
+        self._source_id: Optional[int] = None
+
+    def schedule(self, key: Hashable, callback: Callable[[], Any]) -> None:
+        self._callbacks[key] = callback
+        if self._timer is None:
+            self._timer = MinuteTimer()
+            self._timer.arm()
+            self._source_id = GLib.io_add_watch(self._timer.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self._on_timer)
+
+    def cancel(self, key: Hashable) -> None:
+        self._callbacks.pop(key, None)
+        if not self._callbacks:
+            self.cleanup()
+
+    def cleanup(self) -> None:
+        self._callbacks.clear()
+        if self._timer is not None:
+            GLib.source_remove(self._source_id)
+            self._timer.close()
+            self._timer = None
+            self._source_id = None
+
+    def _on_timer(self, *_: Any) -> bool:
+        assert self._timer is not None
+        if not self._timer.read():
+            _LOG.debug("Wall clock set, syncing clocks")
+        self._timer.arm()
+        for callback in list(self._callbacks.values()):
+            callback()
+        return True
@@ -0,0 +1,55 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import logging
+from typing import List, Optional
+
+import reactivex
+from injector import singleton, inject
+from reactivex import Observable
+
+from gx52.repository.profile_repository import ProfileRepository, Profile, ProfileClass
+
+_LOG = logging.getLogger(__name__)
+
+
+@singleton
+class ProfileInteractor:
+    @inject
+    def __init__(self, profile_repository: ProfileRepository) -> None:
+        self._profile_repository = profile_repository
+
+    def get_profiles(self, profile_class: ProfileClass) -> List[Profile]:
+        profiles: List[Profile] = self._profile_repository.get_profiles(profile_class)
+        return profiles
+
+    def get_profile(self, profile_class: ProfileClass, profile_id: int) -> Optional[Profile]:
+        return self._profile_repository.get_profile(profile_class, profile_id)
+
+    def get_default_profile(self, profile_class: ProfileClass) -> Profile:
+        return self._profile_repository.get_default_profile(profile_class)
+
+    def create_profile(self, profile_class: ProfileClass, name: str) -> Observable:
+        _LOG.debug("ProfileInteractor.create_profile()")
+        return reactivex.defer(lambda _: reactivex.from_future(
+            self._profile_repository.create_profile(profile_class, name)))
+
+    def update_profile(self, profile: Profile) -> None:
+        self._profile_repository.update_profile(profile)
+
+    def delete_profile(self, profile: Profile) -> None:
+        _LOG.debug("ProfileInteractor.delete_profile()")
+        self._profile_repository.delete_profile(profile)
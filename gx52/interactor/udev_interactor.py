@@ -1,4 +1,5 @@
 import logging
+import re
 from typing import Optional, Callable
 
 from injector import singleton, inject
@@ -14,8 +15,12 @@ _UDEV_RULE_FILE_PATH = '/lib/udev/rules.d/60-gx52.rules'
 _UDEV_RULE_RELOAD_COMMANDS = 'udevadm control --reload-rules ' \
                              '&& udevadm trigger --subsystem-match=usb --attr-match=idVendor=06a3 --action=add'
 
+# sysfs name of a USB device port, e.g. 3-1.4 (interfaces have a ":config.interface" suffix)
+_USB_BUS_PATH_REGEX = re.compile(r'/(\d+-[\d.]+)(?=/)')
+
 _LOG = logging.getLogger(__name__)
 
+
 @singleton
 class UdevInteractor:
     @inject
@@ -34,9 +39,15 @@ class UdevInteractor:
     def device_event(self, observer: MonitorObserver, device: Device) -> None:
         if device.device_node is None and (ID_VENDOR == int(device.get("ID_VENDOR_ID"), 16)):
             assert self._callback is not None
-            self._callback()
+            self._callback(self._get_usb_bus_path(device))
             _LOG.debug(f'event {device.action} on device {device}')
 
+    @staticmethod
+    def _get_usb_bus_path(device: Device) -> Optional[str]:
+        # The parent USB device could be already gone from sysfs on removal, so the path is parsed instead of queried
+        bus_paths = _USB_BUS_PATH_REGEX.findall(device.sys_path)
+        return bus_paths[-1] if bus_paths else None
+
     @staticmethod
     def add_udev_rule() -> int:
         cmd = ['pkexec',
@@ -16,14 +16,18 @@
 # along with gst.  If not, see <http://www.gnu.org/licenses/>.
 import datetime
 import logging
-from typing import Union, Tuple
+from concurrent.futures import Future
+from typing import Tuple, Optional, AsyncIterator, Callable, List
 
 import reactivex
 from injector import singleton, inject
 from reactivex import Observable
 
-from gx52.driver.x52_driver import X52Driver, X52ColoredLedStatus, X52LedStatus, X52DateFormat, _X52_MFD_LINE_SIZE
-from gx52.repository.x52_repository import X52Repository
+from gx52.driver.x52_driver import X52Driver, X52DateFormat, X52State, _X52_MFD_LINE_SIZE
+from gx52.repository.x52_repository import X52Repository, EvdevFrame
+from gx52.util.axis import AxisSnapshot
+from gx52.util.latency import LatencyTrace
+from gx52.util.x52 import EvdevReaction
 
 _LOG = logging.getLogger(__name__)
 
@@ -34,49 +38,45 @@ class X52DriverInteractor:
     def __init__(self, x52_repository: X52Repository, ) -> None:
         self._x52_repository = x52_repository
 
-    def get_devices(self) -> Observable:
+    def get_devices(self, bus_path: Optional[str] = None) -> Observable:
         _LOG.debug("X52DriverInteractor.get_devices()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.get_devices()))
+        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.get_devices(bus_path)))
 
     def set_mfd_mode_line(self,
                           driver: X52Driver,
-                          mode: str) -> Observable:
+                          mode: str,
+                          trace: Optional[LatencyTrace] = None) -> Observable:
         _LOG.debug("X52DriverInteractor.set_mfd_brightness()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.set_mfd_line1(driver, mode[:_X52_MFD_LINE_SIZE])))
+        return reactivex.defer(lambda _: reactivex.from_future(
+            self._x52_repository.set_mfd_line1(driver, mode[:_X52_MFD_LINE_SIZE], trace=trace)))
 
     def set_mfd_button_line(self,
                             driver: X52Driver,
-                            button: str) -> Observable:
+                            button: str,
+                            trace: Optional[LatencyTrace] = None) -> Observable:
         _LOG.debug("X52DriverInteractor.set_mfd_brightness()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.set_mfd_line2(driver, button[:_X52_MFD_LINE_SIZE])))
+        return reactivex.defer(lambda _: reactivex.from_future(
+            self._x52_repository.set_mfd_line2(driver, button[:_X52_MFD_LINE_SIZE], trace=trace)))
+
+    def set_shift_status(self,
+                         driver: X52Driver,
+                         enabled: bool) -> Observable:
+        _LOG.debug("X52DriverInteractor.set_shift_status()")
+        return reactivex.defer(lambda _: reactivex.from_future(self._x52_repository.set_shift_status(driver, enabled)))
 
     def set_mfd_profile_name_line(self,
                                   driver: X52Driver,
                                   name: str,
                                   clear_mfd: bool = False) -> Observable:
         _LOG.debug("X52DriverInteractor.set_mfd_line3()")
-        return reactivex.defer(
-            lambda _: reactivex.just(self._x52_repository.set_mfd_line3(driver, name[:_X52_MFD_LINE_SIZE], clear_mfd)))
-
-    def set_led_status(self,
-                       driver: X52Driver,
-                       led_status: Union[X52ColoredLedStatus, X52LedStatus],
-                       attr_name: str) -> Observable:
-        _LOG.debug("X52DriverInteractor.set_led_status()")
-        return reactivex.defer(
-            lambda _: reactivex.just(self._x52_repository.set_led_status(driver, led_status, attr_name)))
-
-    def set_led_brightness(self,
-                           driver: X52Driver,
-                           brightness: int) -> Observable:
-        _LOG.debug("X52DriverInteractor.set_led_brightness()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.set_led_brightness(driver, brightness)))
-
-    def set_mfd_brightness(self,
-                           driver: X52Driver,
-                           brightness: int) -> Observable:
-        _LOG.debug("X52DriverInteractor.set_mfd_brightness()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.set_mfd_brightness(driver, brightness)))
+        return reactivex.defer(lambda _: reactivex.from_future(
+            self._x52_repository.set_mfd_line3(driver, name[:_X52_MFD_LINE_SIZE], clear_mfd)))
+
+    def apply_state(self,
+                    driver: X52Driver,
+                    state: X52State) -> Observable:
+        _LOG.debug("X52DriverInteractor.apply_state()")
+        return reactivex.defer(lambda _: reactivex.from_future(self._x52_repository.apply_state(driver, state)))
 
     def set_date_time(self,
                       driver: X52Driver,
@@ -84,20 +84,75 @@ class X52DriverInteractor:
                       use_24h: Tuple[bool, bool, bool],
                       clock2_offset: datetime.timedelta,
                       clock3_offset: datetime.timedelta,
-                      date_format: X52DateFormat) -> Observable:
+                      date_format: X52DateFormat,
+                      clock2_zone: Optional[str] = None,
+                      clock3_zone: Optional[str] = None) -> Observable:
         _LOG.debug("X52DriverInteractor.set_date_time()")
-        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.set_date_time(
+        return reactivex.defer(lambda _: reactivex.from_future(self._x52_repository.set_date_time(
             driver,
             use_local_time,
             use_24h,
             clock2_offset,
             clock3_offset,
-            date_format)))
+            date_format,
+            clock2_zone,
+            clock3_zone)))
+
+    def read_evdev_frames(self,
+                          driver: X52Driver) -> AsyncIterator[EvdevFrame]:
+        _LOG.debug("X52DriverInteractor.read_evdev_frames()")
+        frames: AsyncIterator[EvdevFrame] = self._x52_repository.read_evdev_frames(driver)
+        return frames
+
+    def react_to_evdev_frames(self,
+                              driver: X52Driver,
+                              reaction: Callable[[EvdevFrame], None]) -> Future:
+        _LOG.debug("X52DriverInteractor.react_to_evdev_frames()")
+        future: Future = self._x52_repository.react_to_evdev_frames(driver, reaction)
+        return future
+
+    def apply_evdev_reaction(self,
+                             driver: X52Driver,
+                             reaction: EvdevReaction,
+                             trace: Optional[LatencyTrace] = None) -> List[Future]:
+        """Queue the device updates of the reaction directly, without going through the GTK main loop."""
+        futures = []
+        if reaction.mode_line is not None:
+            futures.append(self._x52_repository.set_mfd_line1(driver,
+                                                              reaction.mode_line[:_X52_MFD_LINE_SIZE],
+                                                              trace=trace.branch() if trace else None))
+        if reaction.button_line is not None:
+            futures.append(self._x52_repository.set_mfd_line2(driver,
+                                                              reaction.button_line[:_X52_MFD_LINE_SIZE],
+                                                              trace=trace.branch() if trace else None))
+        if reaction.shift is not None:
+            futures.append(self._x52_repository.set_shift_status(driver, reaction.shift))
+        return futures
 
-    def get_evdev_events(self,
-                         driver: X52Driver) -> Observable:
-        _LOG.debug("X52DriverInteractor.get_evdev_events()")
-        return self._x52_repository.get_evdev_events(driver)
+    def read_axis_snapshots(self,
+                            driver: X52Driver,
+                            rate: float) -> AsyncIterator[AxisSnapshot]:
+        _LOG.debug("X52DriverInteractor.read_axis_snapshots()")
+        snapshots: AsyncIterator[AxisSnapshot] = self._x52_repository.read_axis_snapshots(driver, rate)
+        return snapshots
+
+    def start_evdev_recording(self, path: str) -> None:
+        self._x52_repository.start_evdev_recording(path)
+
+    def create_latency_trace(self, origin: float) -> LatencyTrace:
+        return self._x52_repository.create_latency_trace(origin)
+
+    def get_latency_percentiles(self) -> Observable:
+        _LOG.debug("X52DriverInteractor.get_latency_percentiles()")
+        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.get_latency_percentiles()))
+
+    def get_axis_statistics(self, driver: X52Driver) -> Observable:
+        _LOG.debug("X52DriverInteractor.get_axis_statistics()")
+        return reactivex.defer(lambda _: reactivex.just(self._x52_repository.get_axis_statistics(driver)))
 
     def set_send_ev_abs_events(self, should_send: bool) -> None:
         self._x52_repository.should_send_ev_abs_events = should_send
+
+    def get_send_ev_abs_events(self) -> bool:
+        should_send: bool = self._x52_repository.should_send_ev_abs_events
+        return should_send
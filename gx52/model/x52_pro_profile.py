@@ -27,6 +27,9 @@ from gx52.model.enum_field import EnumField
 
 _LOG = logging.getLogger(__name__)
 
+LED_ATTR_NAMES = ('led_fire', 'led_a', 'led_b', 'led_d', 'led_e', 'led_t1_t2', 'led_t3_t4', 'led_t5_t6', 'led_pov_2',
+                  'led_i', 'led_throttle')
+
 
 class X52ProProfile(Model):
     id = AutoIncrementField()
@@ -47,8 +50,10 @@ class X52ProProfile(Model):
     clock_1_use_local_time = BooleanField(default=True)
     clock_1_use_24h = BooleanField(default=True)
     clock_2_offset = IntegerField(default=CLOCK_2_OFFSET_DEFAULT)
+    clock_2_zone = CharField(null=True)
     clock_2_use_24h = BooleanField(default=True)
     clock_3_offset = IntegerField(default=CLOCK_3_OFFSET_DEFAULT)
+    clock_3_zone = CharField(null=True)
     clock_3_use_24h = BooleanField(default=True)
     date_format = EnumField(default=X52DateFormat.YYMMDD, choices=X52DateFormat)
     can_be_removed = BooleanField(default=True)
@@ -74,8 +79,10 @@ class X52ProProfile(Model):
                    clock_1_use_local_time=None,
                    clock_1_use_24h=None,
                    clock_2_offset=None,
+                   clock_2_zone=None,
                    clock_2_use_24h=None,
                    clock_3_offset=None,
+                   clock_3_zone=None,
                    clock_3_use_24h=None,
                    date_format=None,
                    can_be_removed=None)
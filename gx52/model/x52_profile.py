@@ -36,8 +36,10 @@ class X52Profile(Model):
     clock_1_use_local_time = BooleanField(default=False)
     clock_1_use_24h = BooleanField(default=True)
     clock_2_offset = IntegerField(default=CLOCK_2_OFFSET_DEFAULT)
+    clock_2_zone = CharField(null=True)
     clock_2_use_24h = BooleanField(default=True)
     clock_3_offset = IntegerField(default=CLOCK_3_OFFSET_DEFAULT)
+    clock_3_zone = CharField(null=True)
     clock_3_use_24h = BooleanField(default=True)
     date_format = EnumField(default=X52DateFormat.YYMMDD, choices=X52DateFormat)
     can_be_removed = BooleanField(default=True)
@@ -52,8 +54,10 @@ class X52Profile(Model):
                    clock_1_use_local_time=None,
                    clock_1_use_24h=None,
                    clock_2_offset=None,
+                   clock_2_zone=None,
                    clock_2_use_24h=None,
                    clock_3_offset=None,
+                   clock_3_zone=None,
                    clock_3_use_24h=None,
                    date_format=None,
                    can_be_removed=None)
@@ -14,35 +14,47 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with gx52.  If not, see <http://www.gnu.org/licenses/>.
-import datetime
+import asyncio
 import logging
 import multiprocessing
-from datetime import timedelta
-from typing import Optional, Any, List, Tuple, Union
+from concurrent.futures import Future
+from datetime import timedelta, datetime
+from typing import Optional, Any, List, Tuple, Union, Dict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-import reactivex
-from evdev import ecodes, categorize, InputEvent
 from gi.repository import Gtk, GLib
 from injector import inject, singleton
+import reactivex
 from reactivex import Observable, operators
-from reactivex.disposable import CompositeDisposable
+from reactivex.disposable import CompositeDisposable, Disposable
 from reactivex.scheduler import ThreadPoolScheduler
 from reactivex.scheduler.mainloop import GtkScheduler
+from reactivex.subject import Subject
 
 from gx52.conf import APP_NAME, APP_SOURCE_URL, APP_VERSION, APP_ID, APP_PACKAGE_NAME
-from gx52.driver.x52_driver import X52Driver, X52DeviceType, X52DateFormat, X52ProEvdevKeyMapping, X52EvdevKeyMapping
+from gx52.driver.x52_driver import X52Driver, X52DeviceType, X52DateFormat, X52State
 from gx52.interactor.check_new_version_interactor import CheckNewVersionInteractor
 from gx52.interactor.settings_interactor import SettingsInteractor
+from gx52.interactor.clock_sync_interactor import ClockSyncInteractor
+from gx52.interactor.profile_interactor import ProfileInteractor
 from gx52.interactor.udev_interactor import UdevInteractor
 from gx52.interactor.x52_driver_interactor import X52DriverInteractor
 from gx52.model.x52_profile import X52Profile
 from gx52.model.x52_pro_profile import X52ProProfile
 from gx52.presenter.preferences_presenter import PreferencesPresenter
+from gx52.repository.x52_repository import EvdevFrame
+from gx52.util.axis import AxisSnapshot, AxisStatistics, format_axis_statistics, get_axis_name
+from gx52.util.latency import LatencyTrace, format_latency_percentiles
 from gx52.util.view import show_notification, open_uri, get_default_application
-from gx52.util.x52 import get_button_name, is_mode_button
+from gx52.util.x52 import get_profile_state, get_evdev_reaction
 
 _LOG = logging.getLogger(__name__)
 _ADD_NEW_PROFILE_INDEX = -10
+# Dragging a brightness scale changes the value at every step: the device gets at most one value per interval, and
+# always the last one
+_BRIGHTNESS_APPLY_INTERVAL = 1 / 30
+# The axes are followed at the display refresh rate at most, whatever the rate of their events
+_AXIS_SNAPSHOT_RATE = 60
 
 
 class MainViewInterface:
@@ -73,6 +85,9 @@ class MainViewInterface:
     def show_error_message_dialog(self, title: str, message: str) -> None:
         raise NotImplementedError()
 
+    def show_report_dialog(self, title: str, report: str) -> None:
+        raise NotImplementedError()
+
 
 @singleton
 class MainPresenter:
@@ -80,7 +95,9 @@ class MainPresenter:
     def __init__(self,
                  preferences_presenter: PreferencesPresenter,
                  x52_driver_interactor: X52DriverInteractor,
+                 profile_interactor: ProfileInteractor,
                  udev_interactor: UdevInteractor,
+                 clock_sync_interactor: ClockSyncInteractor,
                  settings_interactor: SettingsInteractor,
                  check_new_version_interactor: CheckNewVersionInteractor,
                  composite_disposable: CompositeDisposable,
@@ -90,30 +107,41 @@ class MainPresenter:
         self._preferences_presenter = preferences_presenter
         self._scheduler = ThreadPoolScheduler(multiprocessing.cpu_count())
         self._x52_driver_interactor = x52_driver_interactor
+        self._profile_interactor = profile_interactor
         self._udev_interactor = udev_interactor
+        self._clock_sync_interactor = clock_sync_interactor
+        self._clock_sync_bus_path: Optional[str] = None
         self._settings_interactor = settings_interactor
         self._check_new_version_interactor = check_new_version_interactor
         self._composite_disposable: CompositeDisposable = composite_disposable
         self._profile_selected: Optional[Union[X52ProProfile, X52Profile]] = None
-        self._last_applied_profile: Optional[Union[X52ProProfile, X52Profile]] = None
+        self._device_state = X52State()
         self._driver_list: List[X52Driver] = []
         self._driver_index = 0
+        self._evdev_task: Optional[Union[asyncio.Task, Future]] = None
+        self._axis_task: Optional[asyncio.Task] = None
+        self._composite_disposable.add(Disposable(self._stop_evdev_events))
+        self._brightness_changed_subject: Subject = Subject()
 
     def on_start(self) -> None:
         self._register_db_listeners()
+        self._register_brightness_listeners()
         self._udev_interactor.monitor_device_events(self._get_devices)
         self._get_devices()
         if self._settings_interactor.get_int('settings_check_new_version'):
             self._check_new_version()
 
+    def start_evdev_recording(self, path: str) -> None:
+        self._x52_driver_interactor.start_evdev_recording(path)
+
     def on_application_window_delete_event(self, *_: Any) -> bool:
         if self._settings_interactor.get_int('settings_minimize_to_tray'):
             self.on_toggle_app_window_clicked()
             return True
         return False
 
-    def _get_devices(self) -> None:
-        self._composite_disposable.add(self._x52_driver_interactor.get_devices().pipe(
+    def _get_devices(self, bus_path: Optional[str] = None) -> None:
+        self._composite_disposable.add(self._x52_driver_interactor.get_devices(bus_path).pipe(
             operators.subscribe_on(self._scheduler),
             operators.observe_on(GtkScheduler(GLib)),
         ).subscribe(on_next=self._handle_get_devices_result, on_error=self._handle_get_devices_result))
@@ -130,6 +158,24 @@ class MainPresenter:
     def on_menu_about_clicked(self, *_: Any) -> None:
         self.main_view.show_about_dialog()
 
+    def on_menu_input_latency_clicked(self, *_: Any) -> None:
+        self._composite_disposable.add(
+            self._x52_driver_interactor.get_latency_percentiles().pipe(
+                operators.subscribe_on(self._scheduler),
+                operators.observe_on(GtkScheduler(GLib)),
+            ).subscribe(on_next=self._handle_latency_percentiles_result,
+                        on_error=lambda e: _LOG.exception(f"Input latency error: {str(e)}")))
+
+    def on_menu_axis_statistics_clicked(self, *_: Any) -> None:
+        if not self._driver_list:
+            return
+        self._composite_disposable.add(
+            self._x52_driver_interactor.get_axis_statistics(self._driver_list[self._driver_index]).pipe(
+                operators.subscribe_on(self._scheduler),
+                operators.observe_on(GtkScheduler(GLib)),
+            ).subscribe(on_next=self._handle_axis_statistics_result,
+                        on_error=lambda e: _LOG.exception(f"Axis statistics error: {str(e)}")))
+
     def on_profile_selected(self, tree_selection: Gtk.TreeSelection) -> None:
         list_store, tree_iter = tree_selection.get_selected()
         if self._driver_list:
@@ -140,43 +186,33 @@ class MainPresenter:
                 profile_class = X52Profile
             else:
                 raise ValueError(f"Unsupported device type {device_type.name}")
-            profile = None if tree_iter is None else profile_class.get_or_none(id=list_store.get_value(tree_iter, 0))
+            profile = None if tree_iter is None \
+                else self._profile_interactor.get_profile(profile_class, list_store.get_value(tree_iter, 0))
             if profile is not None:
                 self._profile_selected = profile
+                self._apply_state(get_profile_state(profile), "Profile")
                 self._update_mfd_profile_name(profile.name, True)
                 self.main_view.refresh_profile_data(self._profile_selected)
 
     def on_profile_remove_clicked(self, *_: Any) -> None:
-        self._profile_selected.delete_instance(recursive=True)
+        self._profile_interactor.delete_profile(self._profile_selected)
         self._profile_selected = None
-        self._last_applied_profile = None
+        self._device_state = X52State()
         self._get_devices()
 
     def on_led_brightness_value_changed(self, widget: Any, *_: Any) -> None:
         brightness = int(widget.get_value())
-        if brightness != self._last_applied_profile.led_brightness:
-            self._last_applied_profile.led_brightness = brightness
-            self._composite_disposable.add(
-                self._x52_driver_interactor.set_led_brightness(self._driver_list[self._driver_index], brightness).pipe(
-                    operators.subscribe_on(self._scheduler),
-                    operators.observe_on(GtkScheduler(GLib)),
-                ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "LED brightness")))
         if brightness != self._profile_selected.led_brightness:
             self._profile_selected.led_brightness = brightness
-            self._profile_selected.save()
+            self._profile_interactor.update_profile(self._profile_selected)
+            self._brightness_changed_subject.on_next(self._profile_selected)
 
     def on_mfd_brightness_value_changed(self, widget: Any, *_: Any) -> None:
         brightness = int(widget.get_value())
-        if brightness != self._last_applied_profile.mfd_brightness:
-            self._last_applied_profile.mfd_brightness = brightness
-            self._composite_disposable.add(
-                self._x52_driver_interactor.set_mfd_brightness(self._driver_list[self._driver_index], brightness).pipe(
-                    operators.subscribe_on(self._scheduler),
-                    operators.observe_on(GtkScheduler(GLib)),
-                ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "LED brightness")))
         if brightness != self._profile_selected.mfd_brightness:
             self._profile_selected.mfd_brightness = brightness
-            self._profile_selected.save()
+            self._profile_interactor.update_profile(self._profile_selected)
+            self._brightness_changed_subject.on_next(self._profile_selected)
 
     def on_mfd_checkbuttons_toggled(self, widget: Any, *_: Any) -> None:
         _LOG.debug("on_mfd_checkbuttons_toggled")
@@ -185,28 +221,30 @@ class MainPresenter:
         self._profile_selected.clock_1_use_24h = use_24h[0]
         self._profile_selected.clock_2_use_24h = use_24h[1]
         self._profile_selected.clock_3_use_24h = use_24h[2]
-        self._profile_selected.save()
+        self._profile_interactor.update_profile(self._profile_selected)
         self._update_mfd_date_time()
 
     def on_mfd_clock_2_changed(self, widget: Any, *_: Any) -> None:
-        offset = int(widget.get_active_id())
-        if self._profile_selected.clock_2_offset != offset:
+        offset, zone = self._get_clock_offset_and_zone(widget.get_active_id(), self._profile_selected.clock_2_offset)
+        if (self._profile_selected.clock_2_offset, self._profile_selected.clock_2_zone) != (offset, zone):
             self._profile_selected.clock_2_offset = offset
-            self._profile_selected.save()
+            self._profile_selected.clock_2_zone = zone
+            self._profile_interactor.update_profile(self._profile_selected)
             self._update_mfd_date_time()
 
     def on_mfd_clock_3_changed(self, widget: Any, *_: Any) -> None:
-        offset = int(widget.get_active_id())
-        if self._profile_selected.clock_3_offset != offset:
+        offset, zone = self._get_clock_offset_and_zone(widget.get_active_id(), self._profile_selected.clock_3_offset)
+        if (self._profile_selected.clock_3_offset, self._profile_selected.clock_3_zone) != (offset, zone):
             self._profile_selected.clock_3_offset = offset
-            self._profile_selected.save()
+            self._profile_selected.clock_3_zone = zone
+            self._profile_interactor.update_profile(self._profile_selected)
             self._update_mfd_date_time()
 
     def on_mfd_date_settings_changed(self, widget: Any, *_: Any) -> None:
         date_format = X52DateFormat(int(widget.get_active_id()))
         if self._profile_selected.date_format != date_format:
             self._profile_selected.date_format = date_format
-            self._profile_selected.save()
+            self._profile_interactor.update_profile(self._profile_selected)
             self._update_mfd_date_time()
 
     def on_profile_name_icon_release(self, widget: Any, *_: Any) -> None:
@@ -216,12 +254,16 @@ class MainPresenter:
         profile_name = widget.get_text()
         device_type = self._get_current_device_type()
         if device_type == X52DeviceType.X52_PRO:
-            self._profile_selected = X52ProProfile.create(name=profile_name)
+            profile_class = X52ProProfile
         elif device_type == X52DeviceType.X52:
-            self._profile_selected = X52Profile.create(name=profile_name)
+            profile_class = X52Profile
         else:
             raise ValueError(f"Unsupported device type {device_type.name}")
-        self._refresh_profile_combobox()
+        self._composite_disposable.add(
+            self._profile_interactor.create_profile(profile_class, profile_name).pipe(
+                operators.observe_on(GtkScheduler(GLib)),
+            ).subscribe(on_next=self._handle_create_profile_result,
+                        on_error=lambda e: self._handle_generic_set_result(e, "Profile")))
 
     def on_led_status_selected(self, widget: Any, *_: Any) -> None:
         active = widget.get_active()
@@ -230,20 +272,11 @@ class MainPresenter:
             enum_value = widget.get_model()[active][0]
             attr_name = widget.get_model()[active][2]
             old_led_status = getattr(self._profile_selected, attr_name)
-            last_applied_led_status = getattr(self._last_applied_profile, attr_name)
-            new_led_status = type(old_led_status)(enum_value)
-            if last_applied_led_status != new_led_status:
-                setattr(self._last_applied_profile, attr_name, new_led_status)
-            self._composite_disposable.add(
-                self._x52_driver_interactor.set_led_status(
-                    self._driver_list[self._driver_index], new_led_status, attr_name).pipe(
-                    operators.subscribe_on(self._scheduler),
-                    operators.observe_on(GtkScheduler(GLib)),
-                ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "LED status")))
             new_led_status = type(old_led_status)(enum_value)
+            self._apply_state(self._device_state.with_led(attr_name, new_led_status), "LED status")
             if old_led_status != new_led_status:
                 setattr(self._profile_selected, attr_name, new_led_status)
-                self._profile_selected.save()
+                self._profile_interactor.update_profile(self._profile_selected)
 
     @staticmethod
     def on_quit_clicked(*_: Any) -> None:
@@ -252,28 +285,39 @@ class MainPresenter:
     def on_toggle_app_window_clicked(self, *_: Any) -> None:
         self.main_view.toggle_window_visibility()
 
-    def _update_mfd_mode_line(self, text: str) -> None:
+    def _apply_state(self, state: X52State, name: str) -> None:
+        if state != self._device_state:
+            self._device_state = state
+            self._composite_disposable.add(
+                self._x52_driver_interactor.apply_state(self._driver_list[self._driver_index], state).pipe(
+                    operators.observe_on(GtkScheduler(GLib)),
+                ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, name)))
+
+    def _update_mfd_mode_line(self, text: str, trace: Optional[LatencyTrace] = None) -> None:
         _LOG.debug("update_mfd_mode_line")
         self._composite_disposable.add(
-            self._x52_driver_interactor.set_mfd_mode_line(self._driver_list[self._driver_index], text).pipe(
-                operators.subscribe_on(self._scheduler),
+            self._x52_driver_interactor.set_mfd_mode_line(self._driver_list[self._driver_index], text, trace).pipe(
                 operators.observe_on(GtkScheduler(GLib)),
             ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "MFD Mode")))
 
-    def _update_mfd_button_line(self, text: str) -> None:
+    def _update_mfd_button_line(self, text: str, trace: Optional[LatencyTrace] = None) -> None:
         _LOG.debug("update_mfd_button_line")
         self._composite_disposable.add(
-            self._x52_driver_interactor.set_mfd_button_line(self._driver_list[self._driver_index], text).pipe(
-                operators.subscribe_on(self._scheduler),
+            self._x52_driver_interactor.set_mfd_button_line(self._driver_list[self._driver_index], text, trace).pipe(
                 operators.observe_on(GtkScheduler(GLib)),
             ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "MFD Button")))
 
+    def _update_shift_status(self, enabled: bool) -> None:
+        self._composite_disposable.add(
+            self._x52_driver_interactor.set_shift_status(self._driver_list[self._driver_index], enabled).pipe(
+                operators.observe_on(GtkScheduler(GLib)),
+            ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "Shift indicator")))
+
     def _update_mfd_profile_name(self, name: str, clear_mfd: bool = False) -> None:
         self._composite_disposable.add(
             self._x52_driver_interactor.set_mfd_profile_name_line(self._driver_list[self._driver_index],
                                                                   name,
                                                                   clear_mfd).pipe(
-                operators.subscribe_on(self._scheduler),
                 operators.observe_on(GtkScheduler(GLib)),
             ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "MFD Profile name")))
 
@@ -287,6 +331,19 @@ class MainPresenter:
         #                                                       f"Db signal error: {str(e)}"))
         pass  # TODO
 
+    def _register_brightness_listeners(self) -> None:
+        scheduler = GtkScheduler(GLib)
+        # Leading edge at a fixed rate while dragging, trailing edge for the final value
+        self._composite_disposable.add(reactivex.merge(
+            self._brightness_changed_subject.pipe(operators.throttle_first(_BRIGHTNESS_APPLY_INTERVAL, scheduler)),
+            self._brightness_changed_subject.pipe(operators.debounce(_BRIGHTNESS_APPLY_INTERVAL, scheduler)),
+        ).subscribe(on_next=self._apply_brightness))
+
+    def _apply_brightness(self, profile: Union[X52ProProfile, X52Profile]) -> None:
+        if profile is self._profile_selected and self._driver_list:
+            self._apply_state(self._device_state._replace(led_brightness=profile.led_brightness,
+                                                          mfd_brightness=profile.mfd_brightness), "Brightness")
+
     def _refresh_profile_combobox(self) -> None:
         data: List[Tuple[int, str]] = []
         active = 0
@@ -298,7 +355,7 @@ class MainPresenter:
                 profile_class = X52Profile
             else:
                 raise ValueError(f"Unsupported device type {device_type.name}")
-            for index, profile in enumerate(profile_class.select()):
+            for index, profile in enumerate(self._profile_interactor.get_profiles(profile_class)):
                 data.append((profile.id, profile.name))
                 if profile.id == self._profile_selected.id:
                     active = index
@@ -322,19 +379,13 @@ class MainPresenter:
                     on_error=lambda e: _LOG.exception(f"Check new version error: {str(e)}"))
                                        )
 
-    def _start_periodic_refresh(self) -> None:
-        _LOG.debug("start refresh")
-        self._composite_disposable.add(reactivex.interval(timedelta(milliseconds=999), scheduler=self._scheduler).pipe(
-            operators.start_with(0),
-            operators.subscribe_on(self._scheduler),
-            operators.observe_on(GtkScheduler(GLib)),
-        ).subscribe(on_next=self._on_periodic_refresh_tick,
-                    on_error=lambda e: _LOG.exception(f"Refresh error: {str(e)}")))
-
-    def _on_periodic_refresh_tick(self, _: Any) -> None:
-        now = datetime.datetime.now()
-        if now.second == 0:
-            self._update_mfd_date_time()
+    def _schedule_clock_sync(self) -> None:
+        bus_path = self._driver_list[self._driver_index].bus_path if self._driver_list else None
+        if self._clock_sync_bus_path is not None and self._clock_sync_bus_path != bus_path:
+            self._clock_sync_interactor.cancel(self._clock_sync_bus_path)
+        if bus_path is not None:
+            self._clock_sync_interactor.schedule(bus_path, self._update_mfd_date_time)
+        self._clock_sync_bus_path = bus_path
 
     def _update_mfd_date_time(self) -> None:
         _LOG.debug("update_mfd_date_time")
@@ -347,8 +398,9 @@ class MainPresenter:
                                                            self._profile_selected.clock_3_use_24h),
                                                           timedelta(minutes=self._profile_selected.clock_2_offset),
                                                           timedelta(minutes=self._profile_selected.clock_3_offset),
-                                                          self._profile_selected.date_format).pipe(
-                    operators.subscribe_on(self._scheduler),
+                                                          self._profile_selected.date_format,
+                                                          self._profile_selected.clock_2_zone,
+                                                          self._profile_selected.clock_3_zone).pipe(
                     operators.observe_on(GtkScheduler(GLib)),
                 ).subscribe(on_error=lambda e: self._handle_generic_set_result(e, "Date")))
 
@@ -359,14 +411,13 @@ class MainPresenter:
         else:
             assert isinstance(result, List)
             self._driver_list = result
+            self._device_state = X52State()
             if result:
                 device_type = self._get_current_device_type()
                 if device_type == X52DeviceType.X52_PRO:
-                    self._profile_selected = X52ProProfile.get(X52ProProfile.can_be_removed == False)
-                    self._last_applied_profile = X52ProProfile.get_empty_profile()
+                    self._profile_selected = self._profile_interactor.get_default_profile(X52ProProfile)
                 elif device_type == X52DeviceType.X52:
-                    self._profile_selected = X52Profile.get(X52Profile.can_be_removed == False)
-                    self._last_applied_profile = X52Profile.get_empty_profile()
+                    self._profile_selected = self._profile_interactor.get_default_profile(X52Profile)
                 else:
                     raise ValueError(f"Unsupported device type {device_type.name}")
                 self._monitor_evdev_events()
@@ -382,35 +433,93 @@ class MainPresenter:
                 self._driver_list = []
                 self._driver_index = 0
                 self._profile_selected = None
+                self._stop_evdev_events()
             self._refresh_profile_combobox()
             self._update_mfd_date_time()
-            self._start_periodic_refresh()
+            self._schedule_clock_sync()
 
     def _monitor_evdev_events(self) -> None:
-        _LOG.error("monitor_evdev_events")
-        self._composite_disposable.add(
-            self._x52_driver_interactor.get_evdev_events(self._driver_list[self._driver_index]).pipe(
-                operators.subscribe_on(self._scheduler),
-                operators.observe_on(GtkScheduler(GLib)),
-            ).subscribe(on_next=self._on_evdev_event,
-                        on_error=lambda e: self._handle_generic_set_result(e, "Evdev events")))
-
-    def _on_evdev_event(self, event: InputEvent) -> None:
-        _LOG.debug(f"{event.code} {event.value}")
-        if event.type == ecodes.EV_KEY:
-            key = X52ProEvdevKeyMapping(event.code) if isinstance(self._profile_selected, X52ProProfile) \
-                else X52EvdevKeyMapping(event.code)
-            if is_mode_button(event.code, key):
-                if event.value == 0:
-                    self._update_mfd_mode_line("")
-                else:
-                    self._update_mfd_mode_line(get_button_name(key))
-            else:
-                if event.value == 0:
-                    self._update_mfd_button_line("")
-                else:
-                    self._update_mfd_button_line(get_button_name(key))
-        # elif event.type == ecodes.EV_ABS:
+        _LOG.debug("monitor_evdev_events")
+        self._stop_evdev_events()
+        driver = self._driver_list[self._driver_index]
+        if self._settings_interactor.get_bool('settings_low_latency_input'):
+            is_pro = isinstance(self._profile_selected, X52ProProfile)
+            future = self._x52_driver_interactor.react_to_evdev_frames(
+                driver, lambda frame: self._react_to_evdev_frame(driver, is_pro, frame))
+            future.add_done_callback(self._on_evdev_reaction_done)
+            self._evdev_task = future
+        else:
+            self._evdev_task = asyncio.get_event_loop().create_task(self._read_evdev_events(driver))
+        if self._x52_driver_interactor.get_send_ev_abs_events():
+            self._axis_task = asyncio.get_event_loop().create_task(self._read_axis_snapshots(driver))
+
+    def _stop_evdev_events(self) -> None:
+        if self._evdev_task is not None:
+            self._evdev_task.cancel()
+            self._evdev_task = None
+        if self._axis_task is not None:
+            self._axis_task.cancel()
+            self._axis_task = None
+
+    async def _read_evdev_events(self, driver: X52Driver) -> None:
+        # Runs on the GLib main loop: events are read, mapped and queued for the device without any thread hop
+        try:
+            async for frame in self._x52_driver_interactor.read_evdev_frames(driver):
+                self._on_evdev_frame(frame)
+        except Exception as e:  # pylint: disable=broad-except
+            self._handle_generic_set_result(e, "Evdev events")
+
+    async def _read_axis_snapshots(self, driver: X52Driver) -> None:
+        # Runs on the GLib main loop, which gets the latest axis values at a fixed rate instead of every axis event
+        try:
+            async for snapshot in self._x52_driver_interactor.read_axis_snapshots(driver, _AXIS_SNAPSHOT_RATE):
+                self._on_axis_snapshot(snapshot)
+        except Exception as e:  # pylint: disable=broad-except
+            self._handle_generic_set_result(e, "Axis snapshots")
+
+    @staticmethod
+    def _on_axis_snapshot(snapshot: AxisSnapshot) -> None:
+        axes = ', '.join(f"{get_axis_name(code)}={snapshot.values[code]}" for code in sorted(snapshot.changed))
+        _LOG.debug(f"Axes {axes}")
+
+    def _on_evdev_frame(self, frame: EvdevFrame) -> None:
+        trace = self._x52_driver_interactor.create_latency_trace(frame.timestamp)
+        trace.mark('read')
+        reaction = get_evdev_reaction(frame.events, isinstance(self._profile_selected, X52ProProfile))
+        if reaction.mode_line is not None:
+            self._update_mfd_mode_line(reaction.mode_line, trace.branch())
+        if reaction.button_line is not None:
+            self._update_mfd_button_line(reaction.button_line, trace.branch())
+        if reaction.shift is not None:
+            self._update_shift_status(reaction.shift)
+
+    def _react_to_evdev_frame(self, driver: X52Driver, is_pro: bool, frame: EvdevFrame) -> None:
+        # Low latency path: runs on the input thread, the GTK main loop only hears about errors
+        trace = self._x52_driver_interactor.create_latency_trace(frame.timestamp)
+        trace.mark('read')
+        reaction = get_evdev_reaction(frame.events, is_pro)
+        for future in self._x52_driver_interactor.apply_evdev_reaction(driver, reaction, trace):
+            future.add_done_callback(self._on_evdev_reaction_done)
+
+    def _on_evdev_reaction_done(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            GLib.idle_add(self._handle_generic_set_result, future.exception(), "Evdev reaction")
+
+    def _handle_create_profile_result(self, profile: Union[X52ProProfile, X52Profile]) -> None:
+        self._profile_selected = profile
+        self._refresh_profile_combobox()
+
+    def _handle_axis_statistics_result(self, statistics: List[AxisStatistics]) -> None:
+        if statistics:
+            self.main_view.show_report_dialog("Axis statistics", format_axis_statistics(statistics))
+        else:
+            self.main_view.show_report_dialog("Axis statistics", "No axis movement recorded yet.")
+
+    def _handle_latency_percentiles_result(self, percentiles: Dict[str, Tuple[float, float, float]]) -> None:
+        if percentiles:
+            self.main_view.show_report_dialog("Input latency", format_latency_percentiles(percentiles))
+        else:
+            self.main_view.show_report_dialog("Input latency", "No button press recorded yet.")
 
     def _handle_generic_set_result(self, e: Exception, name: str) -> None:
         _LOG.exception(f"Set {name} error: {str(e)}")
@@ -429,3 +538,20 @@ class MainPresenter:
     @staticmethod
     def _get_changelog_uri(version: str = APP_VERSION) -> str:
         return f"{APP_SOURCE_URL}/blob/{version}/CHANGELOG.md"
+
+    @staticmethod
+    def _get_clock_offset_and_zone(active_id: str, fallback_offset: int) -> Tuple[int, Optional[str]]:
+        """Return the offset in minutes and the time zone name of a clock combobox id, a fixed offset or a time zone.
+
+        For a time zone the offset is the current one, kept as fallback in case the zone is missing from the system. If
+        it is already missing, fallback_offset is kept instead.
+        """
+        if active_id.lstrip('-').isdigit():
+            return int(active_id), None
+        try:
+            offset = datetime.now(ZoneInfo(active_id)).utcoffset()
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            _LOG.warning(f"Time zone {active_id} not available, keeping the offset {fallback_offset}: {e}")
+            return fallback_offset, active_id
+        assert offset is not None
+        return int(offset.total_seconds()) // 60, active_id
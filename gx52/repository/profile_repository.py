@@ -0,0 +1,192 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Type, Union
+
+from injector import singleton, inject
+from peewee import SqliteDatabase
+
+from gx52.model.x52_pro_profile import X52ProProfile
+from gx52.model.x52_profile import X52Profile
+from gx52.util.concurrency import synchronized_with_attr, CommandQueue
+
+_LOG = logging.getLogger(__name__)
+
+Profile = Union[X52ProProfile, X52Profile]
+ProfileClass = Type[Profile]
+
+# Changed profiles are written once no change has been made for _FLUSH_IDLE_DELAY seconds, but no later than
+# _FLUSH_MAX_DELAY seconds after the first unsaved change
+_FLUSH_IDLE_DELAY = 1.0
+_FLUSH_MAX_DELAY = 5.0
+# A failed flush is retried after _FLUSH_RETRY_DELAY seconds, doubled at every failure up to _FLUSH_MAX_RETRY_DELAY
+_FLUSH_RETRY_DELAY = 1.0
+_FLUSH_MAX_RETRY_DELAY = 60.0
+
+
+@singleton
+class ProfileRepository:
+    """Write-behind store of the profiles.
+
+    The profiles are loaded once and the same working copies are returned from then on. Changes to a working copy are
+    only marked: the changed profiles are written later, by a dedicated thread, in a single transaction. Creating and
+    deleting profiles are queued on the same thread, so no caller waits for the database.
+    """
+
+    @inject
+    def __init__(self, database: SqliteDatabase) -> None:
+        self._database = database
+        self._lock = threading.RLock()
+        self._profiles: Dict[ProfileClass, Dict[int, Profile]] = {}
+        # Keyed by id(): peewee models compare by primary key, and a new working copy must not hide a pending one
+        self._dirty_profiles: Dict[int, Profile] = {}
+        self._first_dirty_time: Optional[float] = None
+        # Monotonic time of the next flush, moved by every change: a single thread waits for it
+        self._flush_deadline: Optional[float] = None
+        self._flush_condition = threading.Condition(self._lock)
+        # Monotonic time before which no flush is retried after a failure, and the number of failures in a row
+        self._retry_time = 0.0
+        self._failed_flushes = 0
+        self._closed = False
+        self._writer = CommandQueue("ProfileWriter")
+        threading.Thread(target=self._run_flush_timer, name="ProfileFlushTimer", daemon=True).start()
+
+    @synchronized_with_attr("_lock")
+    def get_profiles(self, profile_class: ProfileClass) -> List[Profile]:
+        return list(self._get_profiles_by_id(profile_class).values())
+
+    @synchronized_with_attr("_lock")
+    def get_profile(self, profile_class: ProfileClass, profile_id: int) -> Optional[Profile]:
+        return self._get_profiles_by_id(profile_class).get(profile_id)
+
+    @synchronized_with_attr("_lock")
+    def get_default_profile(self, profile_class: ProfileClass) -> Profile:
+        return next(profile for profile in self._get_profiles_by_id(profile_class).values()
+                    if not profile.can_be_removed)
+
+    def create_profile(self, profile_class: ProfileClass, name: str) -> Future:
+        """Queue the insert of a new profile; the future gives its working copy, with the id, once inserted."""
+        def create_profile() -> Profile:
+            profile = profile_class.create(name=name)
+            with self._lock:
+                self._get_profiles_by_id(profile_class)[profile.id] = profile
+            return profile
+
+        future: Future = self._writer.submit(create_profile)
+        return future
+
+    @synchronized_with_attr("_lock")
+    def update_profile(self, profile: Profile) -> None:
+        """Mark the working copy as changed, to be written with the next flush."""
+        now = time.monotonic()
+        self._dirty_profiles[id(profile)] = profile
+        if self._first_dirty_time is None:
+            self._first_dirty_time = now
+        # The deadline only moves later while changes keep coming, so the timer thread needs waking up only for the
+        # first one
+        if self._flush_deadline is None:
+            self._flush_condition.notify()
+        self._flush_deadline = max(min(now + _FLUSH_IDLE_DELAY, self._first_dirty_time + _FLUSH_MAX_DELAY),
+                                   self._retry_time)
+
+    @synchronized_with_attr("_lock")
+    def delete_profile(self, profile: Profile) -> Future:
+        self._get_profiles_by_id(type(profile)).pop(profile.id, None)
+        self._dirty_profiles.pop(id(profile), None)
+        future: Future = self._writer.submit(lambda: profile.delete_instance(recursive=True))
+        future.add_done_callback(self._on_write_done)
+        return future
+
+    def flush(self) -> Future:
+        """Write all the changed profiles in a single transaction."""
+        future: Future = self._writer.submit(self._write_dirty_profiles, 'flush')
+        future.add_done_callback(self._on_write_done)
+        return future
+
+    def cleanup(self) -> None:
+        """Write the pending changes and stop the writer; called at shutdown."""
+        with self._lock:
+            self._closed = True
+            self._flush_condition.notify()
+        # Queued after any flush in progress, so it also writes the profiles that one fails to save
+        try:
+            self.flush().result()
+        finally:
+            self._writer.submit(self._database.close).result()
+            self._writer.close()
+
+    def _run_flush_timer(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and (self._flush_deadline is None or time.monotonic() < self._flush_deadline):
+                    self._flush_condition.wait(None if self._flush_deadline is None
+                                               else self._flush_deadline - time.monotonic())
+                if self._closed:
+                    return
+                self._flush_deadline = None
+            self.flush()
+
+    def _get_profiles_by_id(self, profile_class: ProfileClass) -> Dict[int, Profile]:
+        profiles = self._profiles.get(profile_class)
+        if profiles is None:
+            profiles = {profile.id: profile for profile in profile_class.select().order_by(profile_class.id)}
+            self._profiles[profile_class] = profiles
+        return profiles
+
+    def _write_dirty_profiles(self) -> None:
+        with self._lock:
+            profiles = list(self._dirty_profiles.values())
+            self._dirty_profiles.clear()
+            self._first_dirty_time = None
+        if not profiles:
+            return
+        try:
+            with self._database.atomic():
+                for profile in profiles:
+                    profile.save()
+        except BaseException:
+            with self._lock:
+                for profile in profiles:
+                    self._dirty_profiles.setdefault(id(profile), profile)
+                self._schedule_retry()
+            raise
+        with self._lock:
+            self._retry_time = 0.0
+            self._failed_flushes = 0
+        _LOG.debug(f"Saved {len(profiles)} profiles")
+
+    def _schedule_retry(self) -> None:
+        now = time.monotonic()
+        delay = min(_FLUSH_RETRY_DELAY * 2 ** self._failed_flushes, _FLUSH_MAX_RETRY_DELAY)
+        self._failed_flushes += 1
+        self._retry_time = now + delay
+        if self._first_dirty_time is None:
+            self._first_dirty_time = now
+        if self._closed:
+            return
+        if self._flush_deadline is None:
+            self._flush_condition.notify()
+        self._flush_deadline = max(self._flush_deadline or 0.0, self._retry_time)
+        _LOG.warning(f"Unable to save {len(self._dirty_profiles)} profiles, retrying in {delay:.0f} s")
+
+    @staticmethod
+    def _on_write_done(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            _LOG.error(f"Unable to write the profiles: {future.exception()}")
@@ -14,118 +14,373 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
 import datetime
 import logging
 import threading
-from typing import List, Union, Tuple, Optional
+from concurrent.futures import Future
+from typing import List, Tuple, Optional, Dict, Callable, Any, Hashable, AsyncIterator, NamedTuple
+from zoneinfo import ZoneInfoNotFoundError
 
 import evdev
-import reactivex
-from evdev import ecodes, InputDevice
+from evdev import ecodes, InputDevice, InputEvent
 from injector import singleton, inject
-from reactivex import Observable, Observer
-from reactivex.scheduler.scheduler import Scheduler
+from pyudev import Context, Devices, DeviceNotFoundError
 
-from gx52.driver.x52_driver import X52Driver, X52ColoredLedStatus, X52LedStatus, X52DateFormat, X52MfdLine
-from gx52.util.concurrency import synchronized_with_attr
+from gx52.driver.x52_driver import X52Driver, X52DateFormat, X52MfdLine, X52State
+from gx52.util.axis import AxisState, AxisSnapshot, AxisHistory, AxisStatistics
+from gx52.util.clock import ZoneOffsets
+from gx52.util.concurrency import synchronized_with_attr, CommandQueue, EventLoopThread
+from gx52.util.evdev_recording import EvdevRecorder, replay_evdev_recording
+from gx52.util.latency import LatencyStats, LatencyTrace
 
 _LOG = logging.getLogger(__name__)
 
 _EMPTY_MFD_LINE = ""
+_DEFAULT_AXIS_SNAPSHOT_RATE = 60
+
+
+class EvdevFrame(NamedTuple):
+    """The key changes of one hardware report, i.e. the events up to a SYN_REPORT."""
+    timestamp: float
+    events: Tuple[InputEvent, ...]
 
 
 @singleton
 class X52Repository:
     @inject
     def __init__(self) -> None:
+        # Whether the UI follows the axes, through read_axis_snapshots
         self.should_send_ev_abs_events = False
         self._lock = threading.RLock()
-        self._should_monitor_evdev_events = False
+        self._drivers: Dict[str, X52Driver] = {}
+        # Every device has its own ordered writer, so that a slow device doesn't delay the others
+        self._command_queues: Dict[str, CommandQueue] = {}
+        self._evdev_paths: Dict[str, str] = {}
+        self._axis_states: Dict[str, AxisState] = {}
+        self._axis_histories: Dict[str, AxisHistory] = {}
+        self._evdev_recorder: Optional[EvdevRecorder] = None
+        self._latency_stats = LatencyStats()
+        self._input_thread: Optional[EventLoopThread] = None
+        self._zone_offsets = ZoneOffsets()
 
     @synchronized_with_attr("_lock")
-    def get_devices(self) -> List[X52Driver]:
-        return X52Driver.find_supported_devices()
+    def get_devices(self, bus_path: Optional[str] = None) -> List[X52Driver]:
+        """Return the attached devices.
+
+        If the bus path of a hotplugged device is given, only that device is looked up again, otherwise the whole bus
+        is scanned. Drivers of devices that are still attached are reused.
+        """
+        if bus_path is None:
+            self._evdev_paths.clear()
+            drivers = X52Driver.find_supported_devices(self._drivers)
+            self._drivers = {driver.bus_path: driver for driver in drivers}
+        else:
+            self._evdev_paths.pop(bus_path, None)
+            self._drivers.pop(bus_path, None)
+            driver = X52Driver.find_supported_device(bus_path)
+            if driver is not None:
+                self._drivers[bus_path] = driver
+        for path in set(self._command_queues) - set(self._drivers):
+            self._command_queues.pop(path).close()
+        for path in set(self._axis_states) - set(self._drivers):
+            del self._axis_states[path]
+        for path in set(self._axis_histories) - set(self._drivers):
+            del self._axis_histories[path]
+        return [self._drivers[path] for path in sorted(self._drivers)]
 
+    @synchronized_with_attr("_lock")
     def cleanup(self) -> None:
         _LOG.debug("X52Repository cleanup")
-        if self._should_monitor_evdev_events:
-            self._should_monitor_evdev_events = False
+        self.stop_evdev_recording()
+        if self._input_thread is not None:
+            self._input_thread.close()
+        for command_queue in self._command_queues.values():
+            command_queue.close()
+        self._command_queues.clear()
 
-    @synchronized_with_attr("_lock")
-    def set_mfd_line1(self, driver: X52Driver, name: str, clear_mfd: bool = False) -> None:
-        self.set_mfd_line(X52MfdLine.LINE1, driver, name, clear_mfd)
+    def set_mfd_line1(self,
+                      driver: X52Driver,
+                      name: str,
+                      clear_mfd: bool = False,
+                      trace: Optional[LatencyTrace] = None) -> Future:
+        return self.set_mfd_line(X52MfdLine.LINE1, driver, name, clear_mfd, trace)
 
-    @synchronized_with_attr("_lock")
-    def set_mfd_line2(self, driver: X52Driver, name: str, clear_mfd: bool = False) -> None:
-        self.set_mfd_line(X52MfdLine.LINE2, driver, name, clear_mfd)
+    def set_mfd_line2(self,
+                      driver: X52Driver,
+                      name: str,
+                      clear_mfd: bool = False,
+                      trace: Optional[LatencyTrace] = None) -> Future:
+        return self.set_mfd_line(X52MfdLine.LINE2, driver, name, clear_mfd, trace)
+
+    def set_mfd_line3(self,
+                      driver: X52Driver,
+                      name: str,
+                      clear_mfd: bool = False,
+                      trace: Optional[LatencyTrace] = None) -> Future:
+        return self.set_mfd_line(X52MfdLine.LINE3, driver, name, clear_mfd, trace)
+
+    def set_mfd_line(self,
+                     mfd_line: X52MfdLine,
+                     driver: X52Driver,
+                     name: str,
+                     clear_mfd: bool,
+                     trace: Optional[LatencyTrace] = None) -> Future:
+        def set_mfd_line() -> None:
+            if trace is not None:
+                trace.mark('queue')
+            if clear_mfd:
+                driver.set_mfd_text(X52MfdLine.LINE1, _EMPTY_MFD_LINE)
+                driver.set_mfd_text(X52MfdLine.LINE2, _EMPTY_MFD_LINE)
+                driver.set_mfd_text(X52MfdLine.LINE3, _EMPTY_MFD_LINE)
+            driver.set_mfd_text(mfd_line, name)
+            if trace is not None:
+                trace.finish('usb')
+
+        if trace is not None:
+            trace.mark('dispatch')
+        # Each line has a single pending text: while a write is in flight, newer texts replace the queued one
+        return self._submit(driver, set_mfd_line, ('mfd_line', mfd_line, clear_mfd))
+
+    def create_latency_trace(self, origin: float) -> LatencyTrace:
+        """Start following an input event, given its timestamp, through to the USB transfers it causes."""
+        return self._latency_stats.trace(origin)
+
+    def get_latency_percentiles(self) -> Dict[str, Tuple[float, float, float]]:
+        percentiles: Dict[str, Tuple[float, float, float]] = self._latency_stats.get_percentiles()
+        return percentiles
+
+    def set_shift_status(self, driver: X52Driver, enabled: bool) -> Future:
+        return self._submit(driver, lambda: driver.set_shift_status(enabled), 'shift')
+
+    def apply_state(self, driver: X52Driver, state: X52State) -> Future:
+        return self._submit(driver, lambda: driver.apply_state(state), 'state')
+
+    def set_date_time(self, driver: X52Driver,
+                      use_local_time: bool,
+                      use_24h: Tuple[bool, bool, bool],
+                      clock2_offset: datetime.timedelta,
+                      clock3_offset: datetime.timedelta,
+                      date_format: X52DateFormat,
+                      clock2_zone: Optional[str] = None,
+                      clock3_zone: Optional[str] = None) -> Future:
+        """Sync the clocks and the date; clocks 2 and 3 follow the IANA time zone if given, else the fixed offset."""
+
+        def set_date_time() -> None:
+            # Only the fields that changed since the last sync are sent: usually just the minute of clock 1, the date
+            # at midnight and the offsets on profile changes and DST transitions
+            now = datetime.datetime.now(datetime.timezone.utc)
+            offsets = self._get_clock_offset(clock2_zone, clock2_offset, now), \
+                self._get_clock_offset(clock3_zone, clock3_offset, now)
+            if use_local_time:
+                now = now.astimezone()
+                utc_offset = now.utcoffset()
+                assert utc_offset is not None
+                offsets = offsets[0] - utc_offset, offsets[1] - utc_offset
+            driver.apply_state(X52State()
+                               .with_date(now.date(), date_format)
+                               .with_clock_1(now.time(), use_24h[0])
+                               .with_clock_2_offset(offsets[0], use_24h[1])
+                               .with_clock_3_offset(offsets[1], use_24h[2]))
+
+        return self._submit(driver, set_date_time, 'date_time', low_priority=True)
+
+    async def read_evdev_frames(self, driver: X52Driver) -> AsyncIterator[EvdevFrame]:
+        """Yield a frame per hardware report of the device until it is unplugged or reading is cancelled.
+
+        Reports without key changes are skipped, as are the ones the kernel dropped events of. Axis changes are never
+        part of the frames: they only update the latest value of the axis, published at a fixed rate by
+        read_axis_snapshots, and its history, every intermediate value included, see get_axis_statistics.
+
+        The event node is watched by the running event loop, e.g. the GTK main loop: the frames are read, framed and
+        yielded there, without any thread hop.
+        """
+        path = self._get_evdev_path(driver)
+        if path is None:
+            raise LookupError(f"Event node of {driver.bus_path} not found")
+        device = InputDevice(path)
+        try:
+            async for frame in self._get_evdev_frames(device.async_read_loop(),
+                                                      self._get_axis_state(driver),
+                                                      self._get_axis_history(driver),
+                                                      True):
+                yield frame
+        finally:
+            device.close()
+
+    def react_to_evdev_frames(self, driver: X52Driver, reaction: Callable[[EvdevFrame], None]) -> Future:
+        """Read the frames of the device on the input thread and call `reaction` there for each of them.
+
+        Nothing runs on the GTK main loop, so a busy UI doesn't delay the reaction. Cancel the returned future to stop.
+        """
+        async def read_frames() -> None:
+            async for frame in self.read_evdev_frames(driver):
+                reaction(frame)
+
+        future: Future = self._get_input_thread().run(read_frames())
+        return future
+
+    async def replay_evdev_frames(self,
+                                  recording_path: str,
+                                  real_time: bool = False,
+                                  axis_history: Optional[AxisHistory] = None) -> AsyncIterator[EvdevFrame]:
+        """Like read_evdev_frames, but reading the events from a recording instead of the device.
+
+        The axis changes of the recording go to `axis_history` if given, never to the ones of a connected device.
+        """
+        if axis_history is None:
+            axis_history = AxisHistory()
+        events = replay_evdev_recording(recording_path, real_time)
+        async for frame in self._get_evdev_frames(events, AxisState(), axis_history, False):
+            yield frame
 
     @synchronized_with_attr("_lock")
-    def set_mfd_line3(self, driver: X52Driver, name: str, clear_mfd: bool = False) -> None:
-        self.set_mfd_line(X52MfdLine.LINE3, driver, name, clear_mfd)
+    def start_evdev_recording(self, path: str) -> None:
+        """Record the raw events read from now on by read_evdev_frames, see replay_evdev_frames."""
+        self.stop_evdev_recording()
+        _LOG.info(f"Recording evdev events to {path}")
+        self._evdev_recorder = EvdevRecorder(path)
 
     @synchronized_with_attr("_lock")
-    def set_mfd_line(self, mfd_line: X52MfdLine, driver: X52Driver, name: str, clear_mfd: bool) -> None:
-        if clear_mfd:
-            driver.set_mfd_text(X52MfdLine.LINE1, _EMPTY_MFD_LINE)
-            driver.set_mfd_text(X52MfdLine.LINE2, _EMPTY_MFD_LINE)
-            driver.set_mfd_text(X52MfdLine.LINE3, _EMPTY_MFD_LINE)
-        driver.set_mfd_text(mfd_line, name)
+    def stop_evdev_recording(self) -> None:
+        if self._evdev_recorder is not None:
+            self._evdev_recorder.close()
+            self._evdev_recorder = None
+
+    async def _get_evdev_frames(self,
+                                events: AsyncIterator[InputEvent],
+                                axis_state: AxisState,
+                                axis_history: AxisHistory,
+                                record: bool) -> AsyncIterator[EvdevFrame]:
+        frame_events: List[InputEvent] = []
+        dropped = False
+        async for event in events:
+            recorder = self._evdev_recorder
+            if record and recorder is not None:
+                recorder.write(event)
+            if event.type == ecodes.EV_SYN:
+                if event.code == ecodes.SYN_REPORT:
+                    if frame_events and not dropped:
+                        yield EvdevFrame(event.timestamp(), tuple(frame_events))
+                    frame_events.clear()
+                    dropped = False
+                elif event.code == ecodes.SYN_DROPPED:
+                    dropped = True
+            elif event.type == ecodes.EV_KEY:
+                frame_events.append(event)
+            elif event.type == ecodes.EV_ABS:
+                axis_state.update(event.code, event.value)
+                axis_history.append(event.code, event.value)
+
+    async def read_axis_snapshots(self,
+                                  driver: X52Driver,
+                                  rate: float = _DEFAULT_AXIS_SNAPSHOT_RATE) -> AsyncIterator[AxisSnapshot]:
+        """Yield the latest values of the axes read by read_evdev_frames at most `rate` times per second, e.g. at the
+        display refresh rate, whenever any of them changed."""
+        axis_state = self._get_axis_state(driver)
+        while True:
+            await asyncio.sleep(1 / rate)
+            snapshot = axis_state.snapshot()
+            if snapshot is not None:
+                yield snapshot
+
+    def get_axis_statistics(self, driver: X52Driver) -> List[AxisStatistics]:
+        statistics: List[AxisStatistics] = self._get_axis_history(driver).get_statistics()
+        return statistics
 
     @synchronized_with_attr("_lock")
-    def set_led_status(self,
-                       driver: X52Driver,
-                       led_status: Union[X52ColoredLedStatus, X52LedStatus],
-                       attr_name: str) -> None:
-        getattr(driver, f"set_{attr_name}")(led_status)
+    def _get_input_thread(self) -> EventLoopThread:
+        if self._input_thread is None:
+            self._input_thread = EventLoopThread("X52InputThread")
+        return self._input_thread
 
     @synchronized_with_attr("_lock")
-    def set_led_brightness(self, driver: X52Driver, brightness: int) -> None:
-        driver.set_led_brightness(brightness)
+    def _get_axis_state(self, driver: X52Driver) -> AxisState:
+        axis_state = self._axis_states.get(driver.bus_path)
+        if axis_state is None:
+            axis_state = AxisState()
+            self._axis_states[driver.bus_path] = axis_state
+        return axis_state
 
     @synchronized_with_attr("_lock")
-    def set_mfd_brightness(self, driver: X52Driver, brightness: int) -> None:
-        driver.set_mfd_brightness(brightness)
+    def _get_axis_history(self, driver: X52Driver) -> AxisHistory:
+        axis_history = self._axis_histories.get(driver.bus_path)
+        if axis_history is None:
+            axis_history = AxisHistory()
+            self._axis_histories[driver.bus_path] = axis_history
+        return axis_history
 
     @synchronized_with_attr("_lock")
-    def set_date_time(self, driver: X52Driver,
-                      use_local_time: bool,
-                      use_24h: Tuple[bool, bool, bool],
-                      clock2_offset: datetime.timedelta,
-                      clock3_offset: datetime.timedelta,
-                      date_format: X52DateFormat) -> None:
-        now = datetime.datetime.utcnow()
-        if use_local_time:
-            tmp_now = datetime.datetime.now()
-            offset_from_utc = datetime.datetime.now() - now
-            offset_from_utc = offset_from_utc - datetime.timedelta(microseconds=offset_from_utc.microseconds)
-            clock2_offset -= offset_from_utc
-            clock3_offset -= offset_from_utc
-            now = tmp_now
-        driver.set_date(now.date(), date_format)
-        driver.set_clock_1(now.time(), use_24h[0])
-        driver.set_clock_2_offset(clock2_offset, use_24h[1])
-        driver.set_clock_3_offset(clock3_offset, use_24h[2])
+    def _get_evdev_path(self, driver: X52Driver) -> Optional[str]:
+        """Return the event node of the device, cached by bus path until the device is hotplugged again."""
+        path = self._evdev_paths.get(driver.bus_path)
+        if path is None:
+            path = self._find_evdev_path(driver.bus_path) or self._scan_evdev_path(driver)
+            if path is not None:
+                self._evdev_paths[driver.bus_path] = path
+        return path
+
+    @staticmethod
+    def _find_evdev_path(bus_path: str) -> Optional[str]:
+        context = Context()
+        try:
+            usb_device = Devices.from_sys_path(context, f'{context.sys_path}/bus/usb/devices/{bus_path}')
+        except DeviceNotFoundError:
+            _LOG.warning(f"USB device {bus_path} not found in sysfs")
+            return None
+        for device in context.list_devices(subsystem='input', parent=usb_device):
+            if device.device_node is not None and device.sys_name.startswith('event'):
+                return str(device.device_node)
+        return None
+
+    @staticmethod
+    def _scan_evdev_path(driver: X52Driver) -> Optional[str]:
+        _LOG.debug(f"Scanning all the input devices for {driver.bus_path}")
+        for path in evdev.list_devices():
+            try:
+                device = InputDevice(path)
+            except OSError:
+                continue
+            try:
+                if device.info.product == driver.usb_device.idProduct \
+                        and device.info.vendor == driver.usb_device.idVendor:
+                    return str(path)
+            finally:
+                device.close()
+        return None
 
     @synchronized_with_attr("_lock")
-    def get_evdev_events(self, driver: X52Driver) -> Observable:
-        devices = [InputDevice(path) for path in evdev.list_devices()]
-
-        device: Optional[InputDevice] = None
-        for d in devices:
-            if d.info.product == driver.usb_device.idProduct and d.info.vendor == driver.usb_device.idVendor:
-                device = d
-                break
-
-        def observe(observer: Observer, _: Optional[Scheduler]) -> None:
-            assert device is not None
-            self._should_monitor_evdev_events = True
-            for event in device.read_loop():
-                if not self._should_monitor_evdev_events:
-                    break
-                if event.type == ecodes.EV_KEY or \
-                        (event.type == ecodes.EV_ABS and self.should_send_ev_abs_events):
-                    observer.on_next(event)
-            device.close()
-            observer.on_completed()
+    def _get_clock_offset(self,
+                          zone_name: Optional[str],
+                          offset: datetime.timedelta,
+                          now: datetime.datetime) -> datetime.timedelta:
+        if zone_name is not None:
+            try:
+                zone_offset: datetime.timedelta = self._zone_offsets.get_offset(zone_name, now)
+                return zone_offset
+            except (ZoneInfoNotFoundError, ValueError) as e:
+                _LOG.warning(f"Time zone {zone_name} not available, using the fixed offset {offset}: {e}")
+        return offset
+
+    def _submit(self,
+                driver: X52Driver,
+                command: Callable[[], Any],
+                key: Optional[Hashable] = None,
+                low_priority: bool = False) -> Future:
+        """Queue a command on the writer of the device.
 
-        return reactivex.create(observe)
+        Commands with a key are idempotent: a queued command with the same key is replaced by the new one. Background
+        work is low priority and waits for the user feedback queued after it. Submitting never blocks, since it is done
+        from the GTK main loop: if a stalled device filled its queue, the command is rejected (see CommandQueue).
+        """
+        future: Future = self._get_command_queue(driver).submit(command, key, low_priority, block=False)
+        return future
+
+    @synchronized_with_attr("_lock")
+    def _get_command_queue(self, driver: X52Driver) -> CommandQueue:
+        bus_path = driver.bus_path
+        command_queue = self._command_queues.get(bus_path)
+        if command_queue is None:
+            command_queue = CommandQueue(f"X52CommandQueue-{bus_path}")
+            self._command_queues[bus_path] = command_queue
+        return command_queue
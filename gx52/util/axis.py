@@ -0,0 +1,157 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import threading
+import time
+from array import array
+from typing import NamedTuple, Optional, Tuple, FrozenSet, List
+
+import numpy as np
+from evdev import ecodes
+from numpy.typing import NDArray
+
+# ABS_MAX + 1 from linux/input-event-codes.h
+AXIS_COUNT = 0x40
+AXIS_HISTORY_SIZE = 8192
+# Sample-to-sample changes counted by the jitter histogram, larger ones are counted in the first/last bin
+JITTER_RANGE = 8
+# Unreported values inside the range of an axis shorter than this are not considered dead spots
+DEAD_SPOT_MIN_WIDTH = 2
+
+
+class AxisSnapshot(NamedTuple):
+    timestamp: float
+    # Latest value of every axis, indexed by ABS code
+    values: Tuple[int, ...]
+    # ABS codes changed since the previous snapshot
+    changed: FrozenSet[int]
+
+
+class AxisState:
+    """Latest value of every axis of a device.
+
+    Updating it is a store in a preallocated array, so it keeps up with the full event rate; consumers take snapshots
+    at their own pace and only see the last value of each axis.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values = array('i', bytes(4 * AXIS_COUNT))
+        self._changed = 0
+
+    def update(self, code: int, value: int) -> None:
+        with self._lock:
+            self._values[code] = value
+            self._changed |= 1 << code
+
+    def snapshot(self) -> Optional[AxisSnapshot]:
+        """Return the latest values if any axis changed since the previous snapshot, else None."""
+        with self._lock:
+            if not self._changed:
+                return None
+            changed, self._changed = self._changed, 0
+            values = tuple(self._values)
+        return AxisSnapshot(time.time(), values, frozenset(code for code in range(AXIS_COUNT) if changed >> code & 1))
+
+
+class AxisStatistics(NamedTuple):
+    code: int
+    samples: int
+    minimum: int
+    maximum: int
+    mean: float
+    # Mean of the newest quarter of the history minus the one of the oldest quarter
+    center_drift: float
+    # Standard deviation of the sample-to-sample changes
+    noise: float
+    # Count of the sample-to-sample changes from -JITTER_RANGE to +JITTER_RANGE
+    jitter_histogram: Tuple[int, ...]
+    # Ranges of values between minimum and maximum that were never reported
+    dead_spots: Tuple[Tuple[int, int], ...]
+
+
+class AxisHistory:
+    """Last `size` values of every axis, in fixed-size NumPy ring buffers.
+
+    Appending stores the value in place; the statistics are computed on demand with vectorized operations.
+    """
+
+    def __init__(self, size: int = AXIS_HISTORY_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._size = size
+        self._values: NDArray[np.int32] = np.zeros((AXIS_COUNT, size), dtype=np.int32)
+        # Total number of values appended to each axis
+        self._counts = [0] * AXIS_COUNT
+
+    def append(self, code: int, value: int) -> None:
+        with self._lock:
+            count = self._counts[code]
+            self._values[code, count % self._size] = value
+            self._counts[code] = count + 1
+
+    def get_values(self, code: int) -> NDArray[np.int32]:
+        """Return a copy of the values of the axis, from the oldest to the newest."""
+        with self._lock:
+            count = self._counts[code]
+            if count <= self._size:
+                return self._values[code, :count].copy()
+            values: NDArray[np.int32] = np.roll(self._values[code], -(count % self._size))
+            return values
+
+    def get_statistics(self) -> List[AxisStatistics]:
+        return [get_axis_statistics(code, self.get_values(code)) for code in range(AXIS_COUNT) if self._counts[code]]
+
+
+def get_axis_statistics(code: int, values: NDArray[np.int32]) -> AxisStatistics:
+    minimum = int(values.min())
+    maximum = int(values.max())
+    quarter = max(1, len(values) // 4)
+    deltas = np.diff(values)
+    jitter = np.bincount(np.clip(deltas, -JITTER_RANGE, JITTER_RANGE) + JITTER_RANGE, minlength=2 * JITTER_RANGE + 1)
+    # Edges of the runs of never reported values
+    reported = np.bincount(values - minimum, minlength=maximum - minimum + 1) > 0
+    edges: NDArray[np.intp] = np.flatnonzero(np.diff(reported.astype(np.int8)))
+    starts: NDArray[np.intp] = edges[::2] + 1
+    ends: NDArray[np.intp] = edges[1::2] + 1
+    dead_spots = tuple((int(start) + minimum, int(end) + minimum - 1)
+                       for start, end in zip(starts, ends) if end - start >= DEAD_SPOT_MIN_WIDTH)
+    return AxisStatistics(code=code,
+                          samples=len(values),
+                          minimum=minimum,
+                          maximum=maximum,
+                          mean=float(values.mean()),
+                          center_drift=float(values[-quarter:].mean() - values[:quarter].mean()),
+                          noise=float(deltas.std()) if len(deltas) else 0.0,
+                          jitter_histogram=tuple(int(count) for count in jitter),
+                          dead_spots=dead_spots)
+
+
+def get_axis_name(code: int) -> str:
+    name = ecodes.ABS.get(code, str(code))
+    return str(name[0] if isinstance(name, list) else name)
+
+
+def format_axis_statistics(statistics: List[AxisStatistics]) -> str:
+    lines = [f"{'Axis':12s} {'Samples':>8s} {'Min':>6s} {'Max':>6s} {'Mean':>9s} {'Drift':>8s} {'Noise':>7s}"]
+    details: List[str] = [f"Jitter: count of sample-to-sample changes from -{JITTER_RANGE} to +{JITTER_RANGE}"]
+    for axis in statistics:
+        name = get_axis_name(axis.code)
+        lines.append(f"{name:12s} {axis.samples:8d} {axis.minimum:6d} {axis.maximum:6d} {axis.mean:9.1f} "
+                     f"{axis.center_drift:8.2f} {axis.noise:7.2f}")
+        details.append(f"{name:12s} jitter: {' '.join(str(count) for count in axis.jitter_histogram)}")
+        if axis.dead_spots:
+            details.append(f"{name:12s} dead spots: {', '.join(f'{start}-{end}' for start, end in axis.dead_spots)}")
+    return "\n".join(lines + [""] + details)
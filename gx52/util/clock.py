@@ -0,0 +1,130 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import ctypes
+import errno
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# From linux/time.h and sys/timerfd.h
+_CLOCK_REALTIME = 0
+_TFD_CLOEXEC = 0o2000000
+_TFD_NONBLOCK = 0o4000
+_TFD_TIMER_ABSTIME = 1 << 0
+_TFD_TIMER_CANCEL_ON_SET = 1 << 1
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [('it_interval', _Timespec), ('it_value', _Timespec)]
+
+
+_LIBC = ctypes.CDLL(None, use_errno=True)
+_LIBC.timerfd_create.argtypes = [ctypes.c_int, ctypes.c_int]
+_LIBC.timerfd_settime.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(_Itimerspec),
+                                  ctypes.POINTER(_Itimerspec)]
+
+
+class MinuteTimer:
+    """timerfd expiring at the next wall clock minute, or as soon as the wall clock is set.
+
+    The clock is set e.g. by NTP, by the user or when resuming from suspend, so a single deadline is enough to follow
+    the wall clock without polling it.
+    """
+
+    def __init__(self) -> None:
+        self._fd: int = _LIBC.timerfd_create(_CLOCK_REALTIME, _TFD_CLOEXEC | _TFD_NONBLOCK)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def arm(self) -> None:
+        """Expire at the start of the next minute."""
+        deadline = _Itimerspec()
+        deadline.it_value.tv_sec = (int(time.time()) // 60 + 1) * 60
+        if _LIBC.timerfd_settime(self._fd, _TFD_TIMER_ABSTIME | _TFD_TIMER_CANCEL_ON_SET, deadline, None) < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def read(self) -> bool:
+        """Consume the expiration once the timer is readable; return False if the wall clock was set instead."""
+        try:
+            os.read(self._fd, 8)
+        except OSError as e:
+            if e.errno == errno.ECANCELED:
+                return False
+            if e.errno != errno.EAGAIN:
+                raise
+        return True
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def get_next_transition(zone: ZoneInfo,
+                        start: datetime,
+                        horizon: timedelta = timedelta(days=366)) -> Optional[datetime]:
+    """Return the first instant after the aware datetime start at which the UTC offset of zone changes (e.g. DST).
+
+    None if the offset does not change within horizon.
+    """
+    offset = start.astimezone(zone).utcoffset()
+    step = timedelta(days=1)
+    low = start
+    while low - start < horizon:
+        high = low + step
+        if high.astimezone(zone).utcoffset() != offset:
+            # Transitions are at least days apart, so there is exactly one between low and high
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                if middle.astimezone(zone).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            return high.replace(microsecond=0)
+        low = high
+    return None
+
+
+class ZoneOffsets:
+    """UTC offsets of IANA time zones, each computed once for the whole period until the next transition of the zone.
+
+    Callers can ask for the offset at every clock sync: the zone rules are evaluated only when a period runs out.
+    """
+
+    def __init__(self) -> None:
+        # zone name -> (start, end or None if unbounded, offset) of the current period
+        self._periods: Dict[str, Tuple[datetime, Optional[datetime], timedelta]] = {}
+
+    def get_offset(self, zone_name: str, now: datetime) -> timedelta:
+        """Return the UTC offset of zone_name at the aware datetime now; raise ZoneInfoNotFoundError if unknown."""
+        period = self._periods.get(zone_name)
+        if period is None or now < period[0] or (period[1] is not None and now >= period[1]):
+            zone = ZoneInfo(zone_name)
+            offset = now.astimezone(zone).utcoffset()
+            assert offset is not None
+            period = now, get_next_transition(zone, now), offset
+            self._periods[zone_name] = period
+        return period[2]
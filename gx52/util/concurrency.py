@@ -14,7 +14,15 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with gx52.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Callable, Any
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Any, Coroutine, Deque, Dict, Hashable, Optional
+
+_LOG = logging.getLogger(__name__)
 
 
 def synchronized_with_attr(lock_name: str) -> Any:
@@ -27,3 +35,151 @@ def synchronized_with_attr(lock_name: str) -> Any:
         return synced_method
 
     return decorator
+
+
+class TokenBucket:
+    """Rate limiter allowing `rate` operations per second on average, with bursts of up to `capacity` operations."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, reserve: float = 0, timeout: Optional[float] = None) -> bool:
+        """Take a token, waiting until one is available without going below `reserve` tokens.
+
+        Returns False, without taking anything, if that would mean waiting more than `timeout` seconds.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+            self._last_refill = now
+            wait = max(0.0, (reserve + 1 - self._tokens) / self._rate)
+            if timeout is not None and wait > timeout:
+                return False
+            # Taken now, possibly going negative: the wait pays it back before the caller proceeds
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class CommandQueueFullError(Exception):
+    pass
+
+
+class _Command:
+    def __init__(self, function: Callable[[], Any], key: Optional[Hashable]) -> None:
+        self.function = function
+        self.key = key
+        self.future: Future = Future()
+
+
+class CommandQueue:
+    """Ordered queue of commands executed one at a time by a dedicated worker thread.
+
+    A command submitted with a key replaces the queued command with the same key, if any: the latest function wins,
+    it moves to the tail of the queue, so that it still runs after the commands submitted before it, and all the
+    submitters share the same future. Low priority commands run only when no other command is queued.
+
+    Submitting a new command blocks while the queue holds `max_size` commands, unless `block` is False: the command is
+    then rejected and its future fails with CommandQueueFullError. Replacing a queued command never waits.
+    """
+
+    def __init__(self, name: str, max_size: int = 64) -> None:
+        self._name = name
+        self._max_size = max_size
+        self._condition = threading.Condition()
+        self._queue: Deque[_Command] = deque()
+        self._low_priority_queue: Deque[_Command] = deque()
+        self._queued_by_key: Dict[Hashable, _Command] = {}
+        self._running = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self,
+               function: Callable[[], Any],
+               key: Optional[Hashable] = None,
+               low_priority: bool = False,
+               block: bool = True) -> Future:
+        with self._condition:
+            command = self._queued_by_key.get(key) if key is not None else None
+            if command is not None:
+                command.function = function
+                (self._queue if command in self._queue else self._low_priority_queue).remove(command)
+                (self._low_priority_queue if low_priority else self._queue).append(command)
+                return command.future
+            while len(self._queue) + len(self._low_priority_queue) >= self._max_size and not self._closed:
+                if not block:
+                    _LOG.warning(f"{self._name} is full, command rejected")
+                    future: Future = Future()
+                    future.set_exception(CommandQueueFullError(f"{self._name} is full"))
+                    return future
+                self._condition.wait()
+            if self._closed:
+                raise RuntimeError(f"{self._name} is closed")
+            command = _Command(function, key)
+            (self._low_priority_queue if low_priority else self._queue).append(command)
+            if key is not None:
+                self._queued_by_key[key] = command
+            self._condition.notify_all()
+            return command.future
+
+    def join(self) -> None:
+        """Wait until all the submitted commands have been executed."""
+        with self._condition:
+            while self._queue or self._low_priority_queue or self._running:
+                self._condition.wait()
+
+    def close(self) -> None:
+        """Stop the worker after the running command, cancelling the queued ones."""
+        with self._condition:
+            self._closed = True
+            for command in (*self._queue, *self._low_priority_queue):
+                command.future.cancel()
+            self._queue.clear()
+            self._low_priority_queue.clear()
+            self._queued_by_key.clear()
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+                while not self._queue and not self._low_priority_queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                command = (self._queue or self._low_priority_queue).popleft()
+                if command.key is not None:
+                    del self._queued_by_key[command.key]
+                self._running = True
+                self._condition.notify_all()
+            if command.future.set_running_or_notify_cancel():
+                try:
+                    command.future.set_result(command.function())
+                except BaseException as e:  # pylint: disable=broad-except
+                    _LOG.debug(f"{self._name} command failed: {e}")
+                    command.future.set_exception(e)
+
+
+class EventLoopThread:
+    """asyncio event loop running on its own daemon thread, to keep coroutines away from the GTK main loop."""
+
+    def __init__(self, name: str) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine: Coroutine) -> Future:
+        """Schedule the coroutine on the loop; cancelling the returned future cancels it."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def close(self) -> None:
+        """Stop the loop without waiting for the pending coroutines."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,77 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import asyncio
+import mmap
+import struct
+import threading
+from typing import AsyncIterator, Iterator, Optional
+
+from evdev import InputEvent
+
+from gx52.util.concurrency import synchronized_with_attr
+
+_RECORDING_MAGIC = b'GX52EVD1'
+# sec, usec, type, code, value
+_EVENT_STRUCT = struct.Struct('<qIHHi')
+
+
+class EvdevRecorder:
+    """Appends the raw events of an evdev session to a file of fixed-size records.
+
+    Events are written by the input thread while the recording can be stopped from any other: events written after
+    closing are dropped.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')  # pylint: disable=consider-using-with
+        self._file.write(_RECORDING_MAGIC)
+
+    @synchronized_with_attr("_lock")
+    def write(self, event: InputEvent) -> None:
+        if not self._file.closed:
+            self._file.write(_EVENT_STRUCT.pack(event.sec, event.usec, event.type, event.code, event.value))
+
+    @synchronized_with_attr("_lock")
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_evdev_recording(path: str) -> Iterator[InputEvent]:
+    """Yield the events of a recording, memory-mapping the file instead of loading it."""
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(_RECORDING_MAGIC)] != _RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a GX52 evdev recording")
+        # A truncated last record, e.g. if gx52 was killed while recording, is ignored
+        end = len(data) - (len(data) - len(_RECORDING_MAGIC)) % _EVENT_STRUCT.size
+        for offset in range(len(_RECORDING_MAGIC), end, _EVENT_STRUCT.size):
+            yield InputEvent(*_EVENT_STRUCT.unpack_from(data, offset))
+
+
+async def replay_evdev_recording(path: str, real_time: bool = False) -> AsyncIterator[InputEvent]:
+    """Yield the events of a recording, with their original timing if `real_time`, otherwise as fast as possible."""
+    loop = asyncio.get_running_loop()
+    start: Optional[float] = None
+    for event in read_evdev_recording(path):
+        if real_time:
+            if start is None:
+                start = loop.time() - event.timestamp()
+            delay = start + event.timestamp() - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield event
@@ -0,0 +1,88 @@
+# This file is part of gx52
+#
+# Copyright (c) 2020 Roberto Leinardi
+#
+# gst is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gst is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gst.  If not, see <http://www.gnu.org/licenses/>.
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+LATENCY_WINDOW = 1000
+TOTAL_STAGE = 'total'
+
+
+class LatencyTrace:
+    """Travels with an input event and records how long each stage took since the previous one.
+
+    The origin is the timestamp of the event (CLOCK_REALTIME, like evdev), so the first stage includes the time spent
+    in the kernel and waiting for the event loop.
+    """
+
+    def __init__(self, stats: 'LatencyStats', origin: float, last: float) -> None:
+        self._stats = stats
+        self._origin = origin
+        self._last = last
+
+    def mark(self, stage: str) -> None:
+        now = time.time()
+        self._stats.add(stage, now - self._last)
+        self._last = now
+
+    def finish(self, stage: str) -> None:
+        """Mark the last stage and the end to end latency."""
+        self.mark(stage)
+        self._stats.add(TOTAL_STAGE, self._last - self._origin)
+
+    def branch(self) -> 'LatencyTrace':
+        """Return a copy to follow one of the several outputs of the same event."""
+        return LatencyTrace(self._stats, self._origin, self._last)
+
+
+class LatencyStats:
+    """Rolling percentiles of the duration of each stage over the last `window` traces."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._window = window
+        self._durations: Dict[str, Deque[float]] = {}
+
+    def trace(self, origin: float) -> LatencyTrace:
+        return LatencyTrace(self, origin, origin)
+
+    def add(self, stage: str, duration: float) -> None:
+        with self._lock:
+            durations = self._durations.get(stage)
+            if durations is None:
+                durations = deque(maxlen=self._window)
+                self._durations[stage] = durations
+            durations.append(duration)
+
+    def get_percentiles(self) -> Dict[str, Tuple[float, float, float]]:
+        """Return p50, p95 and p99 of each stage, in seconds, in the order the stages were first seen."""
+        with self._lock:
+            snapshot = {stage: sorted(durations) for stage, durations in self._durations.items()}
+        return {stage: (_percentile(durations, 50), _percentile(durations, 95), _percentile(durations, 99))
+                for stage, durations in snapshot.items()}
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+
+def format_latency_percentiles(percentiles: Dict[str, Tuple[float, float, float]]) -> str:
+    lines = [f"{'Stage':10s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}"]
+    for stage, values in percentiles.items():
+        lines.append(f"{stage:10s} " + " ".join(f"{value * 1000:8.2f}" for value in values))
+    return "\n".join(lines)
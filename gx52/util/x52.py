@@ -14,9 +14,46 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with gst.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Union
+from typing import Union, NamedTuple, Optional, Iterable
 
-from gx52.driver.x52_driver import X52EvdevKeyMapping, X52ProEvdevKeyMapping
+from evdev import InputEvent, ecodes
+
+from gx52.driver.x52_driver import X52EvdevKeyMapping, X52ProEvdevKeyMapping, X52State
+from gx52.model.x52_pro_profile import X52ProProfile, LED_ATTR_NAMES
+from gx52.model.x52_profile import X52Profile
+
+
+def get_profile_state(profile: Union[X52ProProfile, X52Profile]) -> X52State:
+    state = X52State(led_brightness=profile.led_brightness, mfd_brightness=profile.mfd_brightness)
+    if isinstance(profile, X52ProProfile):
+        for attr_name in LED_ATTR_NAMES:
+            state = state.with_led(attr_name, getattr(profile, attr_name))
+    return state
+
+
+class EvdevReaction(NamedTuple):
+    """What the device should show after some input events; None means unchanged."""
+    mode_line: Optional[str]
+    button_line: Optional[str]
+    shift: Optional[bool]
+
+
+def get_evdev_reaction(events: Iterable[InputEvent], is_pro: bool) -> EvdevReaction:
+    # Only the last change of each MFD line is kept
+    mode_line: Optional[str] = None
+    button_line: Optional[str] = None
+    shift: Optional[bool] = None
+    for event in events:
+        if event.type == ecodes.EV_KEY:
+            key = X52ProEvdevKeyMapping(event.code) if is_pro else X52EvdevKeyMapping(event.code)
+            text = "" if event.value == 0 else get_button_name(key)
+            if is_mode_button(event.code, key):
+                mode_line = text
+            else:
+                button_line = text
+            if key.value == X52ProEvdevKeyMapping.PINKIE.value:
+                shift = event.value != 0
+    return EvdevReaction(mode_line, button_line, shift)
 
 
 def is_mode_button(code: int, key: Union[X52ProEvdevKeyMapping, X52EvdevKeyMapping]) -> bool:
@@ -20,7 +20,7 @@ from datetime import datetime
 from typing import Optional, Tuple, Any, Union, List
 
 from injector import inject, singleton
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
 
 from gx52.driver.x52_driver import X52_BRIGHTNESS_MIN, X52_BRIGHTNESS_MAX, X52LedStatus, X52ColoredLedStatus
 
@@ -183,6 +183,12 @@ class MainView(MainViewInterface):
         dialog.run()
         dialog.destroy()
 
+    def show_report_dialog(self, title: str, report: str) -> None:
+        dialog = Gtk.MessageDialog(self._window, 0, Gtk.MessageType.INFO, Gtk.ButtonsType.OK, title)
+        dialog.format_secondary_markup(f"<tt>{GLib.markup_escape_text(report)}</tt>")
+        dialog.run()
+        dialog.destroy()
+
     def set_statusbar_text(self, text: str) -> None:
         self._statusbar.remove_all(self._context)
         self._statusbar.push(self._context, text)
@@ -223,9 +229,9 @@ class MainView(MainViewInterface):
             self._mfd_brightness_adjustment.set_value(profile.mfd_brightness)
             self._mfd_clock_1_local_time_checkbutton.set_active(profile.clock_1_use_local_time)
             self._mfd_clock_1_12h_checkbutton.set_active(not profile.clock_1_use_24h)
-            self._mfd_clock_2_comboboxtext.set_active_id(str(profile.clock_2_offset))
+            self._mfd_clock_2_comboboxtext.set_active_id(profile.clock_2_zone or str(profile.clock_2_offset))
             self._mfd_clock_2_12h_checkbutton.set_active(not profile.clock_2_use_24h)
-            self._mfd_clock_3_comboboxtext.set_active_id(str(profile.clock_3_offset))
+            self._mfd_clock_3_comboboxtext.set_active_id(profile.clock_3_zone or str(profile.clock_3_offset))
             self._mfd_clock_3_12h_checkbutton.set_active(not profile.clock_3_use_24h)
             self._mfd_date_settings_comboboxtext.set_active(profile.date_format.value)
         else:
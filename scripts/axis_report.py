@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Record the axes of the attached X52 devices for a while and print their calibration statistics.
+
+Usage: scripts/axis_report.py [--seconds N]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+# pylint: disable=wrong-import-position
+from gx52.driver.x52_driver import X52Driver
+from gx52.repository.x52_repository import X52Repository
+from gx52.util.axis import format_axis_statistics
+
+
+async def _record(repository: X52Repository, driver: X52Driver, seconds: float) -> None:
+    async def read_frames() -> None:
+        async for _ in repository.read_evdev_frames(driver):
+            pass
+
+    try:
+        await asyncio.wait_for(read_frames(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10, help="How long to record the axes for")
+    args = parser.parse_args()
+
+    repository = X52Repository()
+    drivers = repository.get_devices()
+    if not drivers:
+        print("No supported X52 device found", file=sys.stderr)
+        return 1
+    print(f"Move all the axes through their whole range for {args.seconds:g} seconds...")
+    for driver in drivers:
+        asyncio.run(_record(repository, driver, args.seconds))
+        statistics = repository.get_axis_statistics(driver)
+        print(f"\n{driver.x52_device.device_type.value} ({driver.bus_path})")
+        print(format_axis_statistics(statistics) if statistics else "No axis movement recorded")
+    repository.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
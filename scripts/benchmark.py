@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Benchmark the driver, repository and presenter hot paths against a simulated X52 Pro.
+
+Usage: scripts/benchmark.py [--iterations N] [--output results.json] [--compare baseline.json]
+                            [--evdev-recording session.evdev]
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+# pylint: disable=wrong-import-position
+from evdev import InputEvent, ecodes
+from gi.repository import GLib
+from reactivex.disposable import CompositeDisposable
+from reactivex.scheduler import ImmediateScheduler
+
+from gx52.driver.x52_driver import X52Driver, X52DeviceType, X52MfdLine, X52ColoredLedStatus, X52LedStatus, \
+    X52DateFormat, X52ProEvdevKeyMapping, X52WritePolicy
+from gx52.driver.x52_fake_device import FakeX52UsbDevice
+from gx52.interactor.x52_driver_interactor import X52DriverInteractor
+from gx52.model.x52_pro_profile import X52ProProfile, LED_ATTR_NAMES
+from gx52.presenter.main_presenter import MainPresenter, MainViewInterface
+from gx52.repository.x52_repository import X52Repository, EvdevFrame
+from gx52.util.x52 import get_profile_state
+
+
+class _Result:
+    def __init__(self) -> None:
+        self.durations: List[float] = []
+        self.transfers: List[int] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        durations = sorted(self.durations)
+        total = sum(durations)
+        return {
+            'operations': len(durations),
+            'transfers_per_operation': sum(self.transfers) / len(self.transfers),
+            'mean_ms': total / len(durations) * 1000,
+            'p50_ms': _percentile(durations, 50) * 1000,
+            'p99_ms': _percentile(durations, 99) * 1000,
+            'operations_per_second': len(durations) / total if total else None,
+        }
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+
+def _create_driver(rate_limited: bool = False) -> X52Driver:
+    """Create a driver for a simulated X52 Pro, by default without the USB rate limiter so that only gx52 is timed."""
+    usb_device = FakeX52UsbDevice.for_device_type(X52DeviceType.X52_PRO)
+    return X52Driver(usb_device, usb_device.x52_device, None if rate_limited else X52WritePolicy(rate=None))
+
+
+def _measure(driver: X52Driver, iterations: int, operation: Callable[[int], Any]) -> Dict[str, Any]:
+    result = _Result()
+    usb_device = driver.usb_device
+    for i in range(iterations):
+        transfers = len(usb_device.transfers)
+        start = time.perf_counter()
+        operation(i)
+        result.durations.append(time.perf_counter() - start)
+        result.transfers.append(len(usb_device.transfers) - transfers)
+    return result.to_dict()
+
+
+def bench_set_mfd_text(iterations: int, rate_limited: bool = False) -> Dict[str, Any]:
+    driver = _create_driver(rate_limited)
+    texts = ["Fire A (B3)", "", "Fire A (B3)", "Mode 1 (B28)", "Trigger (B1)", "Trigger 2 (B15)"]
+    return _measure(driver, iterations, lambda i: driver.set_mfd_text(X52MfdLine.LINE2, texts[i % len(texts)]))
+
+
+def bench_set_mfd_text_rate_limited(iterations: int) -> Dict[str, Any]:
+    """Same as bench_set_mfd_text with the default write policy: measures the USB rate limiter, not the driver."""
+    return bench_set_mfd_text(iterations, True)
+
+
+def bench_set_colored_led_status(iterations: int) -> Dict[str, Any]:
+    driver = _create_driver()
+    statuses = list(X52ColoredLedStatus)
+    return _measure(driver, iterations, lambda i: driver.set_led_a(statuses[i % len(statuses)]))
+
+
+def bench_apply_profile(iterations: int) -> Dict[str, Any]:
+    driver = _create_driver()
+    repository = X52Repository()
+    colored_statuses = itertools.cycle(X52ColoredLedStatus)
+    states = []
+    for brightness in (0, 16, 32):
+        profile = X52ProProfile(name="Benchmark", led_brightness=brightness, mfd_brightness=brightness)
+        for attr_name in LED_ATTR_NAMES:
+            if attr_name in ('led_fire', 'led_throttle'):
+                setattr(profile, attr_name, X52LedStatus(brightness % 2))
+            else:
+                setattr(profile, attr_name, next(colored_statuses))
+        states.append(get_profile_state(profile))
+    return _measure(driver, iterations, lambda i: repository.apply_state(driver, states[i % len(states)]).result())
+
+
+def bench_set_date_time(iterations: int) -> Dict[str, Any]:
+    driver = _create_driver()
+    repository = X52Repository()
+    return _measure(driver, iterations, lambda i: repository.set_date_time(driver,
+                                                                           True,
+                                                                           (True, True, True),
+                                                                           datetime.timedelta(minutes=-240),
+                                                                           datetime.timedelta(minutes=480),
+                                                                           X52DateFormat.DDMMYY).result())
+
+
+def _create_presenter(driver: X52Driver, repository: X52Repository) -> MainPresenter:
+    presenter = MainPresenter(None, X52DriverInteractor(repository), None, None, None, None, None,
+                              CompositeDisposable())
+    presenter.main_view = MainViewInterface()
+    presenter._scheduler = ImmediateScheduler()  # pylint: disable=protected-access
+    presenter._driver_list = [driver]  # pylint: disable=protected-access
+    presenter._profile_selected = X52ProProfile(name="Benchmark")  # pylint: disable=protected-access
+    return presenter
+
+
+def _measure_frames(driver: X52Driver,
+                    repository: X52Repository,
+                    iterations: int,
+                    get_frame: Callable[[int], EvdevFrame]) -> Dict[str, Any]:
+    presenter = _create_presenter(driver, repository)
+    context = GLib.MainContext.default()
+
+    def on_evdev_frame(i: int) -> None:
+        presenter._on_evdev_frame(get_frame(i))  # pylint: disable=protected-access
+        repository._get_command_queue(driver).join()  # pylint: disable=protected-access
+        while context.iteration(False):
+            pass
+
+    return _measure(driver, iterations, on_evdev_frame)
+
+
+def bench_evdev_to_mfd(iterations: int) -> Dict[str, Any]:
+    driver = _create_driver()
+    repository = X52Repository()
+    codes = [key.value for key in X52ProEvdevKeyMapping]
+
+    def get_frame(i: int) -> EvdevFrame:
+        now = time.time()
+        event = InputEvent(int(now), int(now % 1 * 1000000), ecodes.EV_KEY, codes[i // 2 % len(codes)], (i + 1) % 2)
+        return EvdevFrame(now, (event,))
+
+    return _measure_frames(driver, repository, iterations, get_frame)
+
+
+def bench_evdev_replay(recording_path: str, iterations: int) -> Dict[str, Any]:
+    driver = _create_driver()
+    repository = X52Repository()
+
+    async def read_frames() -> List[EvdevFrame]:
+        return [frame async for frame in repository.replay_evdev_frames(recording_path)]
+
+    frames = asyncio.run(read_frames())
+    if not frames:
+        raise ValueError(f"{recording_path} has no key frames to replay")
+    return _measure_frames(driver, repository, iterations, lambda i: frames[i % len(frames)])
+
+
+_BENCHMARKS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    'driver.set_mfd_text': bench_set_mfd_text,
+    'driver.set_mfd_text_rate_limited': bench_set_mfd_text_rate_limited,
+    'driver.set_colored_led_status': bench_set_colored_led_status,
+    'repository.apply_profile': bench_apply_profile,
+    'repository.set_date_time': bench_set_date_time,
+    'presenter.evdev_to_mfd': bench_evdev_to_mfd,
+}
+
+
+def _get_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _print_comparison(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ('transfers_per_operation', 'mean_ms', 'p99_ms'):
+            old, new = baseline[name][metric], result[metric]
+            ratio = f"{new / old:.2f}x" if old else "n/a"
+            print(f"{name:32s} {metric:24s} {old:10.4f} -> {new:10.4f} ({ratio})")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--output', help="Save the results as JSON to this file")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare against")
+    parser.add_argument('--evdev-recording',
+                        help="Also replay the key frames of this recording (see gx52 --record-evdev) through the "
+                             "presenter")
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run: {', '.join(_BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in _BENCHMARKS:
+            parser.error(f"Unknown benchmark {name}")
+
+    results = {}
+    for name in args.benchmarks or _BENCHMARKS:
+        results[name] = _BENCHMARKS[name](args.iterations)
+        print(f"{name:32s} {json.dumps(results[name])}")
+    if args.evdev_recording:
+        name = 'presenter.evdev_replay'
+        results[name] = bench_evdev_replay(args.evdev_recording, args.iterations)
+        print(f"{name:32s} {json.dumps(results[name])}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'commit': _get_commit(),
+                'python': platform.python_version(),
+                'iterations': args.iterations,
+                'results': results,
+            }, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            _print_comparison(results, json.load(file)['results'])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Simulated X52 Pro shared by the tests."""
+from typing import Callable, Any
+
+import pytest
+
+from gx52.driver.x52_driver import X52Driver, X52DeviceType, X52WritePolicy
+from gx52.driver.x52_fake_device import FakeX52UsbDevice
+
+
+@pytest.fixture
+def usb_device() -> FakeX52UsbDevice:
+    return FakeX52UsbDevice.for_device_type(X52DeviceType.X52_PRO)
+
+
+@pytest.fixture
+def driver(usb_device: FakeX52UsbDevice) -> X52Driver:
+    return X52Driver(usb_device, usb_device.x52_device, X52WritePolicy(rate=None))
+
+
+@pytest.fixture
+def count_transfers(usb_device: FakeX52UsbDevice) -> Callable[[Callable[[], Any]], int]:
+    """Return a function running an operation and returning the number of transfers it sent to the device."""
+
+    def count(operation: Callable[[], Any]) -> int:
+        transfers = len(usb_device.transfers)
+        operation()
+        return len(usb_device.transfers) - transfers
+
+    return count
@@ -0,0 +1,78 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Axis snapshots, history and calibration statistics."""
+import numpy as np
+from evdev import ecodes
+
+from gx52.util.axis import AxisHistory, AxisState, JITTER_RANGE, get_axis_statistics
+
+
+def test_axis_snapshot_keeps_only_the_latest_values() -> None:
+    axis_state = AxisState()
+    assert axis_state.snapshot() is None
+
+    for value in range(1000):
+        axis_state.update(ecodes.ABS_X, value)
+    axis_state.update(ecodes.ABS_Y, 42)
+    snapshot = axis_state.snapshot()
+
+    assert snapshot is not None
+    assert snapshot.changed == frozenset({ecodes.ABS_X, ecodes.ABS_Y})
+    assert snapshot.values[ecodes.ABS_X] == 999
+    assert snapshot.values[ecodes.ABS_Y] == 42
+    assert axis_state.snapshot() is None
+
+
+def test_axis_snapshot_reports_only_the_changed_axes() -> None:
+    axis_state = AxisState()
+    axis_state.update(ecodes.ABS_X, 10)
+    axis_state.snapshot()
+    axis_state.update(ecodes.ABS_Z, 20)
+    snapshot = axis_state.snapshot()
+
+    assert snapshot is not None
+    assert snapshot.changed == frozenset({ecodes.ABS_Z})
+    # The values of the other axes are still the latest ones
+    assert snapshot.values[ecodes.ABS_X] == 10
+
+
+def test_axis_history_keeps_the_newest_values_in_order() -> None:
+    axis_history = AxisHistory(size=4)
+    for value in range(6):
+        axis_history.append(ecodes.ABS_X, value)
+
+    assert axis_history.get_values(ecodes.ABS_X).tolist() == [2, 3, 4, 5]
+    assert [statistics.code for statistics in axis_history.get_statistics()] == [ecodes.ABS_X]
+
+
+def test_axis_statistics_find_the_dead_spots() -> None:
+    values = np.array([0, 1, 2, 6, 7, 8, 9, 20], dtype=np.int32)
+    statistics = get_axis_statistics(ecodes.ABS_X, values)
+
+    assert (statistics.minimum, statistics.maximum, statistics.samples) == (0, 20, 8)
+    assert statistics.dead_spots == ((3, 5), (10, 19))
+
+
+def test_axis_statistics_measure_jitter_and_drift() -> None:
+    values = np.array([100, 101, 100, 101, 110, 111, 110, 111], dtype=np.int32)
+    statistics = get_axis_statistics(ecodes.ABS_X, values)
+
+    jitter = dict(zip(range(-JITTER_RANGE, JITTER_RANGE + 1), statistics.jitter_histogram))
+    assert (jitter[1], jitter[-1], jitter[JITTER_RANGE]) == (4, 2, 1)
+    assert sum(statistics.jitter_histogram) == len(values) - 1
+    assert statistics.center_drift == 10.0
+    assert statistics.mean == 105.5
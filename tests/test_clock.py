@@ -0,0 +1,68 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""DST transitions of the time zones of the secondary clocks."""
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from gx52.util import clock
+from gx52.util.clock import ZoneOffsets, get_next_transition
+
+_BERLIN = ZoneInfo('Europe/Berlin')
+# Start and end of the 2026 summer time in Berlin
+_SPRING_FORWARD = datetime(2026, 3, 29, 1, tzinfo=timezone.utc)
+_FALL_BACK = datetime(2026, 10, 25, 1, tzinfo=timezone.utc)
+
+
+def test_next_transition_is_found_to_the_second() -> None:
+    assert get_next_transition(_BERLIN, datetime(2026, 1, 1, tzinfo=timezone.utc)) == _SPRING_FORWARD
+    assert get_next_transition(_BERLIN, _SPRING_FORWARD) == _FALL_BACK
+    assert get_next_transition(_BERLIN, _FALL_BACK - timedelta(seconds=1)) == _FALL_BACK
+
+
+def test_zone_without_transitions_has_none() -> None:
+    assert get_next_transition(ZoneInfo('Asia/Tokyo'), _SPRING_FORWARD) is None
+    assert get_next_transition(_BERLIN, datetime(2026, 1, 1, tzinfo=timezone.utc), timedelta(days=30)) is None
+
+
+def test_zone_offset_follows_the_transitions() -> None:
+    zone_offsets = ZoneOffsets()
+
+    assert zone_offsets.get_offset('Europe/Berlin', _SPRING_FORWARD - timedelta(seconds=1)) == timedelta(hours=1)
+    assert zone_offsets.get_offset('Europe/Berlin', _SPRING_FORWARD) == timedelta(hours=2)
+    assert zone_offsets.get_offset('Europe/Berlin', _FALL_BACK - timedelta(minutes=1)) == timedelta(hours=2)
+    assert zone_offsets.get_offset('Europe/Berlin', _FALL_BACK) == timedelta(hours=1)
+    # Going back in time, e.g. when the wall clock is set
+    assert zone_offsets.get_offset('Europe/Berlin', _SPRING_FORWARD) == timedelta(hours=2)
+    assert zone_offsets.get_offset('America/New_York', _SPRING_FORWARD) == timedelta(hours=-4)
+
+
+def test_zone_offset_is_computed_once_per_period(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[datetime] = []
+
+    def get_next_transition_spy(zone: ZoneInfo, start: datetime, *args: Any) -> Optional[datetime]:
+        calls.append(start)
+        return get_next_transition(zone, start, *args)
+
+    monkeypatch.setattr(clock, 'get_next_transition', get_next_transition_spy)
+    zone_offsets = ZoneOffsets()
+    for minute in range(0, 60 * 24 * 30, 15):
+        zone_offsets.get_offset('Europe/Berlin', _SPRING_FORWARD - timedelta(days=10, minutes=-minute))
+
+    assert len(calls) == 2
@@ -0,0 +1,110 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Ordering, backpressure and rejection of the CommandQueue, and the TokenBucket rate limiter."""
+import threading
+from typing import Iterator, List
+
+import pytest
+
+from gx52.util.concurrency import CommandQueue, CommandQueueFullError, TokenBucket
+
+
+@pytest.fixture
+def command_queue() -> Iterator[CommandQueue]:
+    command_queue = CommandQueue("TestCommandQueue", max_size=2)
+    yield command_queue
+    command_queue.close()
+
+
+def _block(command_queue: CommandQueue) -> threading.Event:
+    """Keep the worker busy until the returned event is set, so that the next commands are queued."""
+    started = threading.Event()
+    release = threading.Event()
+    command_queue.submit(lambda: (started.set(), release.wait()))
+    assert started.wait(timeout=5)
+    return release
+
+
+def test_low_priority_commands_run_after_the_others(command_queue: CommandQueue) -> None:
+    executed: List[str] = []
+    release = _block(command_queue)
+    command_queue.submit(lambda: executed.append("clock"), low_priority=True)
+    command_queue.submit(lambda: executed.append("button"))
+    release.set()
+    command_queue.join()
+
+    assert executed == ["button", "clock"]
+
+
+def test_full_queue_blocks_the_submitter(command_queue: CommandQueue) -> None:
+    release = _block(command_queue)
+    command_queue.submit(lambda: None)
+    command_queue.submit(lambda: None)
+    submitter = threading.Thread(target=lambda: command_queue.submit(lambda: None))
+    submitter.start()
+    submitter.join(timeout=0.1)
+    assert submitter.is_alive()
+
+    release.set()
+    submitter.join(timeout=5)
+    assert not submitter.is_alive()
+
+
+def test_full_queue_rejects_non_blocking_submits(command_queue: CommandQueue) -> None:
+    release = _block(command_queue)
+    command_queue.submit(lambda: "old text", key='line')
+    command_queue.submit(lambda: None)
+
+    rejected = command_queue.submit(lambda: None, block=False)
+    # Replacing a queued command doesn't need room in the queue
+    replaced = command_queue.submit(lambda: "new text", key='line', block=False)
+    release.set()
+
+    assert isinstance(rejected.exception(timeout=5), CommandQueueFullError)
+    assert replaced.result(timeout=5) == "new text"
+
+
+def test_close_cancels_the_queued_commands(command_queue: CommandQueue) -> None:
+    release = _block(command_queue)
+    queued = command_queue.submit(lambda: None)
+    command_queue.close()
+    release.set()
+
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        command_queue.submit(lambda: None)
+
+
+def test_token_bucket_allows_bursts_then_the_rate() -> None:
+    now = [0.0]
+    token_bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+
+    assert token_bucket.acquire(timeout=0)
+    assert token_bucket.acquire(timeout=0)
+    assert not token_bucket.acquire(timeout=0)
+    now[0] += 0.1
+    assert token_bucket.acquire(timeout=0)
+    assert not token_bucket.acquire(timeout=0)
+
+
+def test_token_bucket_reserve_is_left_to_the_other_callers() -> None:
+    token_bucket = TokenBucket(rate=10, capacity=4, clock=lambda: 0.0)
+
+    assert token_bucket.acquire(reserve=2, timeout=0)
+    assert token_bucket.acquire(reserve=2, timeout=0)
+    assert not token_bucket.acquire(reserve=2, timeout=0)
+    assert token_bucket.acquire(timeout=0)
@@ -0,0 +1,138 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Write-behind flushes of the profiles, against a temporary database."""
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, List
+
+import pytest
+from peewee import OperationalError, SqliteDatabase
+
+pytest.importorskip('gi')
+
+# pylint: disable=wrong-import-position
+from gx52.di import INJECTOR
+
+# The models bind to the injected database when imported: keep them away from the configuration of the user
+INJECTOR.binder.bind(SqliteDatabase, to=SqliteDatabase(None))
+
+from gx52.model.x52_profile import X52Profile
+from gx52.repository import profile_repository
+from gx52.repository.profile_repository import ProfileRepository
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Iterator[SqliteDatabase]:
+    database = SqliteDatabase(str(tmp_path / "gx52.db"))
+    with database.bind_ctx([X52Profile], bind_refs=False, bind_backrefs=False):
+        database.create_tables([X52Profile])
+        database.close()
+        yield database
+
+
+@pytest.fixture
+def repository(database: SqliteDatabase) -> ProfileRepository:
+    """Stopped by the tests themselves, since writing at cleanup is part of what they check."""
+    return ProfileRepository(database)
+
+
+@pytest.fixture
+def profile(repository: ProfileRepository) -> X52Profile:
+    profile = repository.create_profile(X52Profile, "Profile").result(timeout=5)
+    assert isinstance(profile, X52Profile)
+    return profile
+
+
+@pytest.fixture
+def saves(profile: X52Profile, monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    """Brightness of every profile saved after `profile` is created; the first save fails like a locked database."""
+    saves: List[int] = []
+    save = X52Profile.save
+
+    def failing_save(profile: X52Profile, *args: Any, **kwargs: Any) -> Any:
+        saves.append(profile.led_brightness)
+        if len(saves) == 1:
+            raise OperationalError("database is locked")
+        return save(profile, *args, **kwargs)
+
+    monkeypatch.setattr(X52Profile, 'save', failing_save)
+    return saves
+
+
+def _wait_for(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _get_saved_brightness(database: SqliteDatabase, profile: X52Profile) -> int:
+    with database.connection_context():
+        brightness: int = X52Profile.get_by_id(profile.id).led_brightness
+        return brightness
+
+
+def test_changes_are_written_together_once_idle(database: SqliteDatabase,
+                                                repository: ProfileRepository,
+                                                profile: X52Profile,
+                                                monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(profile_repository, '_FLUSH_IDLE_DELAY', 0.05)
+    saves: List[int] = []
+    save = X52Profile.save
+    monkeypatch.setattr(X52Profile, 'save', lambda *args, **kwargs: saves.append(1) or save(*args, **kwargs))
+    for brightness in range(10):
+        profile.led_brightness = brightness
+        repository.update_profile(profile)
+
+    _wait_for(lambda: _get_saved_brightness(database, profile) == 9)
+    repository.cleanup()
+
+    assert len(saves) == 1
+
+
+def test_failed_flush_is_retried(database: SqliteDatabase,
+                                 repository: ProfileRepository,
+                                 profile: X52Profile,
+                                 saves: List[int],
+                                 monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(profile_repository, '_FLUSH_IDLE_DELAY', 0.01)
+    monkeypatch.setattr(profile_repository, '_FLUSH_RETRY_DELAY', 0.05)
+    profile.led_brightness = 42
+    repository.update_profile(profile)
+
+    _wait_for(lambda: _get_saved_brightness(database, profile) == 42)
+    repository.cleanup()
+
+    assert saves == [42, 42]
+
+
+def test_cleanup_writes_the_profiles_of_a_failed_flush(database: SqliteDatabase,
+                                                       repository: ProfileRepository,
+                                                       profile: X52Profile,
+                                                       saves: List[int],
+                                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    # Only explicit flushes
+    monkeypatch.setattr(profile_repository, '_FLUSH_IDLE_DELAY', 60.0)
+    monkeypatch.setattr(profile_repository, '_FLUSH_RETRY_DELAY', 60.0)
+    profile.led_brightness = 42
+    repository.update_profile(profile)
+
+    assert isinstance(repository.flush().exception(timeout=5), OperationalError)
+    repository.cleanup()
+
+    assert saves == [42, 42]
+    assert _get_saved_brightness(database, profile) == 42
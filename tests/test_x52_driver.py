@@ -0,0 +1,161 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Transfer counts, retries and degradation of the driver against the simulated X52 Pro."""
+import datetime
+import errno
+from typing import Callable, Any
+
+import pytest
+from usb.core import USBError
+
+from gx52.driver.x52_driver import X52Driver, X52MfdLine, X52ColoredLedStatus, X52LedStatus, X52State, X52LedRed, \
+    X52LedGreen, X52WritePolicy, X52DeviceDegradedError, X52RateLimitedError
+from gx52.driver.x52_fake_device import FakeX52UsbDevice
+
+CountTransfers = Callable[[Callable[[], Any]], int]
+
+
+def _get_all_leds_state() -> X52State:
+    state = X52State()
+    for attr_name in ('led_a', 'led_b', 'led_d', 'led_e', 'led_t1_t2', 'led_t3_t4', 'led_t5_t6', 'led_pov_2', 'led_i'):
+        state = state.with_led(attr_name, X52ColoredLedStatus.GREEN)
+    return state.with_led('led_fire', X52LedStatus.ON).with_led('led_throttle', X52LedStatus.ON)
+
+
+def test_set_mfd_text_sends_only_the_changed_characters(driver: X52Driver,
+                                                        usb_device: FakeX52UsbDevice,
+                                                        count_transfers: CountTransfers) -> None:
+    # Clear plus 3 pairs of characters, then only the 3 appended pairs
+    assert count_transfers(lambda: driver.set_mfd_text(X52MfdLine.LINE1, "Fire A")) == 4
+    assert count_transfers(lambda: driver.set_mfd_text(X52MfdLine.LINE1, "Fire A (B3)")) == 3
+    assert count_transfers(lambda: driver.set_mfd_text(X52MfdLine.LINE1, "Fire A (B3)")) == 0
+    # Not a continuation of the shown text: clear and rewrite
+    assert count_transfers(lambda: driver.set_mfd_text(X52MfdLine.LINE1, "Mode 1")) == 4
+    assert usb_device.mfd_lines[X52MfdLine.LINE1] == "Mode 1"
+
+
+def test_vendor_commands_already_applied_are_skipped(driver: X52Driver,
+                                                     count_transfers: CountTransfers) -> None:
+    assert count_transfers(lambda: driver.set_led_a(X52ColoredLedStatus.RED)) == 2
+    assert count_transfers(lambda: driver.set_led_a(X52ColoredLedStatus.RED)) == 0
+    assert count_transfers(lambda: driver.set_led_a(X52ColoredLedStatus.AMBER)) == 1
+    assert count_transfers(lambda: driver.set_mfd_brightness(32)) == 1
+    assert count_transfers(lambda: driver.set_mfd_brightness(32)) == 0
+
+
+def test_apply_state_writes_only_the_diff(driver: X52Driver,
+                                          usb_device: FakeX52UsbDevice,
+                                          count_transfers: CountTransfers) -> None:
+    state = _get_all_leds_state()._replace(led_brightness=10, mfd_brightness=20, shift=False) \
+        .with_led('led_a', X52ColoredLedStatus.RED)
+    # Every LED bit, both brightness levels and the shift indicator
+    assert count_transfers(lambda: driver.apply_state(state)) == 23
+    assert usb_device.state._replace(blink=None) == state
+    assert count_transfers(lambda: driver.apply_state(state)) == 0
+    assert count_transfers(lambda: driver.apply_state(state.with_led('led_a', X52ColoredLedStatus.GREEN))) == 2
+    # Single register setters keep the applied state known
+    assert count_transfers(lambda: driver.set_shift_status(True)) == 1
+    assert count_transfers(lambda: driver.apply_state(state)) == 3
+
+
+def test_led_change_leaves_the_unknown_leds_untouched(driver: X52Driver,
+                                                      usb_device: FakeX52UsbDevice,
+                                                      count_transfers: CountTransfers) -> None:
+    state = X52State().with_led('led_b', X52ColoredLedStatus.RED)
+    assert count_transfers(lambda: driver.apply_state(state)) == 2
+    assert usb_device.state.led_mask == 1 << X52LedRed.X52_BIT_LED_B_RED | 1 << X52LedGreen.X52_BIT_LED_B_GREEN
+    # The LED is now known, the others are still not written
+    assert count_transfers(lambda: driver.set_led_b(X52ColoredLedStatus.RED)) == 0
+    assert count_transfers(lambda: driver.apply_state(_get_all_leds_state())) == 20
+
+
+def test_clock_sync_writes_only_the_changed_fields(driver: X52Driver,
+                                                   usb_device: FakeX52UsbDevice,
+                                                   count_transfers: CountTransfers) -> None:
+    now = datetime.datetime(2026, 3, 28, 23, 59)
+    state = X52State().with_date(now.date()).with_clock_1(now.time()) \
+        .with_clock_2_offset(datetime.timedelta(hours=1)).with_clock_3_offset(datetime.timedelta(hours=-5))
+    # Date day/month and year, the 3 clocks
+    assert count_transfers(lambda: driver.apply_state(state)) == 5
+    # The clock shows minutes only
+    later = now + datetime.timedelta(seconds=59)
+    assert count_transfers(lambda: driver.apply_state(state.with_clock_1(later.time()))) == 0
+    assert count_transfers(lambda: driver.apply_state(state.with_clock_1(datetime.time(23, 58)))) == 1
+    # Midnight: the time and the day change, the year and the offsets don't
+    tomorrow = now + datetime.timedelta(minutes=1)
+    state = state.with_date(tomorrow.date()).with_clock_1(tomorrow.time())
+    assert count_transfers(lambda: driver.apply_state(state)) == 2
+    assert (usb_device.state.date_ddmm, usb_device.state.clock_1) == (state.date_ddmm, state.clock_1)
+
+
+def test_failed_transfer_is_retried(usb_device: FakeX52UsbDevice) -> None:
+    driver = X52Driver(usb_device, usb_device.x52_device, X52WritePolicy(rate=None, retry_backoff=0))
+    usb_device.errors.append(USBError("Operation timed out", errno=errno.ETIMEDOUT))
+    driver.set_shift_status(True)
+
+    assert usb_device.state.shift
+    # Unplugged: retrying is pointless
+    usb_device.errors.append(USBError("No such device", errno=errno.ENODEV))
+    with pytest.raises(USBError):
+        driver.set_shift_status(False)
+    assert usb_device.state.shift
+
+
+def test_mfd_characters_are_not_appended_twice(usb_device: FakeX52UsbDevice) -> None:
+    driver = X52Driver(usb_device, usb_device.x52_device, X52WritePolicy(rate=None, retry_backoff=0))
+    driver.set_mfd_text(X52MfdLine.LINE2, "Fire")
+    usb_device.errors.append(USBError("Operation timed out", errno=errno.ETIMEDOUT))
+    with pytest.raises(USBError):
+        driver.set_mfd_text(X52MfdLine.LINE2, "Fire A")
+    # The line content is unknown after the failure: it is cleared and rewritten
+    driver.set_mfd_text(X52MfdLine.LINE2, "Fire A")
+
+    assert usb_device.mfd_lines[X52MfdLine.LINE2] == "Fire A"
+
+
+def test_degraded_device_drops_interactive_commands_until_it_responds(usb_device: FakeX52UsbDevice) -> None:
+    driver = X52Driver(usb_device,
+                       usb_device.x52_device,
+                       X52WritePolicy(rate=None, max_retries=0, failure_threshold=3, recovery_time=60))
+    for enabled in (True, False, True):
+        usb_device.errors.append(USBError("Operation timed out", errno=errno.ETIMEDOUT))
+        with pytest.raises(USBError):
+            driver.set_shift_status(enabled)
+    assert driver.degraded
+
+    transfers = len(usb_device.transfers)
+    with pytest.raises(X52DeviceDegradedError):
+        driver.set_led_fire(X52LedStatus.ON)
+    assert len(usb_device.transfers) == transfers
+    # Background commands still probe the device, and a success closes the circuit
+    driver.set_clock_1(datetime.time(12, 30))
+    assert not driver.degraded
+    driver.set_led_fire(X52LedStatus.ON)
+    assert len(usb_device.transfers) == transfers + 2
+
+
+def test_background_commands_are_dropped_before_using_the_reserve(usb_device: FakeX52UsbDevice) -> None:
+    driver = X52Driver(usb_device,
+                       usb_device.x52_device,
+                       X52WritePolicy(rate=1, burst=2, background_reserve=1, background_max_delay=0))
+    driver.set_clock_1(datetime.time(12, 30))
+    with pytest.raises(X52RateLimitedError):
+        driver.set_clock_1(datetime.time(12, 31))
+    # The reserved token still goes to user feedback
+    driver.set_shift_status(True)
+
+    assert len(usb_device.transfers) == 2
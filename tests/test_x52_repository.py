@@ -0,0 +1,93 @@
+# This file is part of gx52.
+#
+# Copyright (c) 2018 Roberto Leinardi
+#
+# gx52 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gx52 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gx52.  If not, see <http://www.gnu.org/licenses/>.
+"""Ordering of the commands queued by the repository, against the simulated X52 Pro, and evdev replay."""
+import asyncio
+import threading
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from evdev import InputEvent, ecodes
+
+from gx52.driver.x52_driver import X52Driver, X52MfdLine
+from gx52.driver.x52_fake_device import FakeX52UsbDevice
+from gx52.repository.x52_repository import EvdevFrame, X52Repository
+from gx52.util.axis import AxisHistory
+from gx52.util.evdev_recording import EvdevRecorder
+
+
+@pytest.fixture
+def repository() -> Iterator[X52Repository]:
+    repository = X52Repository()
+    yield repository
+    repository.cleanup()
+
+
+def test_line_text_replaced_after_a_clear_is_not_wiped(repository: X52Repository,
+                                                       driver: X52Driver,
+                                                       usb_device: FakeX52UsbDevice) -> None:
+    release = threading.Event()
+    # Keep the worker busy, so that the next commands are queued
+    repository._submit(driver, release.wait)  # pylint: disable=protected-access
+    repository.set_mfd_line1(driver, "Old mode")
+    repository.set_mfd_line3(driver, "Profile", clear_mfd=True)
+    new_mode = repository.set_mfd_line1(driver, "New mode")
+    release.set()
+    new_mode.result(timeout=5)
+
+    assert usb_device.mfd_lines[X52MfdLine.LINE1] == "New mode"
+    assert usb_device.mfd_lines[X52MfdLine.LINE3].rstrip() == "Profile"
+
+
+def test_replaced_command_shares_the_future_and_runs_once(repository: X52Repository,
+                                                          driver: X52Driver,
+                                                          usb_device: FakeX52UsbDevice) -> None:
+    release = threading.Event()
+    repository._submit(driver, release.wait)  # pylint: disable=protected-access
+    futures = [repository.set_mfd_line2(driver, f"Button {i}") for i in range(10)]
+    release.set()
+    futures[-1].result(timeout=5)
+
+    assert all(future is futures[0] for future in futures)
+    assert usb_device.mfd_lines[X52MfdLine.LINE2] == "Button 9"
+    # A single clear and rewrite of the line
+    assert len(usb_device.transfers) == 5
+
+
+def test_replay_keeps_the_axes_out_of_the_frames_and_of_the_device_history(repository: X52Repository,
+                                                                           driver: X52Driver,
+                                                                           tmp_path: Path) -> None:
+    recording_path = str(tmp_path / "recording.evdev")
+    recorder = EvdevRecorder(recording_path)
+    for usec, (event_type, code, value) in enumerate([(ecodes.EV_ABS, ecodes.ABS_X, 100),
+                                                      (ecodes.EV_SYN, ecodes.SYN_REPORT, 0),
+                                                      (ecodes.EV_ABS, ecodes.ABS_X, 101),
+                                                      (ecodes.EV_KEY, ecodes.BTN_TRIGGER, 1),
+                                                      (ecodes.EV_SYN, ecodes.SYN_REPORT, 0)]):
+        recorder.write(InputEvent(0, usec, event_type, code, value))
+    recorder.close()
+    axis_history = AxisHistory()
+
+    async def replay() -> List[EvdevFrame]:
+        return [frame async for frame in repository.replay_evdev_frames(recording_path, axis_history=axis_history)]
+
+    frames = asyncio.run(replay())
+
+    assert [[(event.type, event.code) for event in frame.events] for frame in frames] == \
+           [[(ecodes.EV_KEY, ecodes.BTN_TRIGGER)]]
+    assert axis_history.get_values(ecodes.ABS_X).tolist() == [100, 101]
+    assert not repository.get_axis_statistics(driver)